@@ -0,0 +1,291 @@
+import collections
+import contextlib
+import datetime
+import gc
+import sys
+import time
+import tracemalloc
+
+from django import forms
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.base import Template
+from django.utils.datastructures import MultiValueDict
+
+from demo_service.forms import LongForm, FieldsetForm, RevealingForm
+from govuk_forms.fields import SplitDateField, YearField
+from govuk_forms.forms import GOVUKForm
+
+this_year = datetime.date.today().year
+
+
+class Scenario:
+    """
+    Creates a fresh form for every iteration and renders it the way demo.html does
+    """
+
+    def __init__(self, name, form_class, data=None, files=None, initial=None, **form_options):
+        self.name = name
+        if form_options:
+            form_class = type(form_class.__name__, (form_class,), form_options)
+        self.form_class = form_class
+        self.data = data
+        self.files = files
+        self.initial = initial
+
+    def make_form(self):
+        if self.data is None:
+            return self.form_class(initial=self.initial)
+        prefix = self.form_class.prefix
+        data = MultiValueDict({
+            '%s-%s' % (prefix, name) if prefix else name: value if isinstance(value, list) else [value]
+            for name, value in self.data.items()
+        })
+        files = MultiValueDict({
+            '%s-%s' % (prefix, name) if prefix else name: [SimpleUploadedFile(file_name, b'demo')]
+            for name, file_name in (self.files or {}).items()
+        })
+        return self.form_class(data=data, files=files, initial=self.initial)
+
+    def run(self, form):
+        return ''.join((
+            form.error_summary(),
+            form.as_div(),
+            form.submit_button(),
+        ))
+
+
+class LargeChoicesForm(GOVUKForm):
+    """
+    Choice fields with several hundred options, e.g. countries or courts
+    """
+    auto_replace_widgets = True
+    large_choices = [('c%03d' % index, 'Choice %d' % index) for index in range(300)]
+
+    select = forms.ChoiceField(choices=large_choices)
+    radio = forms.ChoiceField(choices=large_choices, widget=forms.RadioSelect)
+    check = forms.MultipleChoiceField(choices=large_choices, widget=forms.CheckboxSelectMultiple)
+
+
+# a form with many date fields, e.g. an employment or address history
+ManyDatesForm = type('ManyDatesForm', (GOVUKForm,), dict(
+    [
+        ('start_%d' % index, SplitDateField(label='Start date %d' % (index + 1), required=False))
+        for index in range(20)
+    ] + [
+        ('year_%d' % index, YearField(label='Year %d' % (index + 1), required=False))
+        for index in range(4)
+    ],
+    __module__=__name__, auto_replace_widgets=True,
+))
+
+
+long_form_valid = {
+    'text': 'sample', 'text_optional': '', 'text_with_hint': 'hint helped', 'number': '5',
+    'email': 'example@gov.uk', 'url': 'https://www.gov.uk/', 'password': '1234', 'textarea': 'Lorem ipsum',
+    'date': '2018-02-01', 'datetime_': '2018-02-01 10:30', 'time': '10:30',
+    'split_date_0': '1', 'split_date_1': '2', 'split_date_2': '2018',
+    'split_datetime_0': '2018-02-01', 'split_datetime_1': '10:30',
+    'date_select_0': '1', 'date_select_1': '2', 'date_select_2': str(this_year),
+    'date_select_required_0': '1', 'date_select_required_1': '2', 'date_select_required_2': str(this_year),
+    'select': 'a', 'select_groups': 'c', 'select_multiple': ['a', 'd'],
+    'yes_no': 'on', 'yes_no_null': '2',
+    'check': ['a'], 'check_inline': ['b'], 'check_separated': ['e'], 'check_grouped': ['c'],
+    'radio': 'a', 'radio_inline': 'b', 'radio_separated': 'e', 'radio_grouped': 'd',
+    'hidden': 'secret',
+}
+long_form_invalid = dict(
+    long_form_valid,
+    text='', number='50', email='not an e-mail address', url='',
+    split_date_0='31', split_date_1='2', split_date_2='18',
+    date_select_required_0='0', date_select_required_1='0', date_select_required_2='0',
+    select='z', select_multiple=[], yes_no='', check=[], radio='',
+)
+long_form_files = {'file': 'file.txt', 'clearable_file': 'file.txt'}
+long_form_initial = {
+    'text': 'sample', 'text_optional': 'not necessary', 'text_with_hint': 'hint helped',
+    'email': 'example@gov.uk', 'url': 'gov.uk', 'password': '1234',
+    'number': 123, 'textarea': '\nLorem ipsum\n',
+    'date': datetime.date(this_year, 2, 1), 'datetime_': datetime.datetime(this_year, 2, 1, 10, 30),
+    'time': datetime.time(10, 30),
+    'split_date': datetime.date(this_year, 2, 1), 'split_datetime': datetime.datetime(this_year, 2, 1, 10, 30),
+    'date_select': datetime.date(this_year, 2, 1), 'date_select_required': datetime.date(this_year, 2, 1),
+    'select': 'a', 'select_groups': 'c', 'select_multiple': ['d'],
+    'yes_no': True, 'yes_no_null': False,
+    'check': 'a', 'check_inline': 'b', 'check_separated': 'e', 'check_grouped': 'c',
+    'radio': 'a', 'radio_inline': 'b', 'radio_separated': 'e', 'radio_grouped': 'd',
+    'hidden': 'secret',
+}
+
+fieldset_form_valid = {
+    'first_name': 'Jane', 'last_name': 'Doe', 'email': 'jane@example.com',
+    'address': '102 Petty France', 'city': 'London', 'postcode': 'SW1H 9AJ', 'country': 'UK',
+}
+fieldset_form_invalid = dict(fieldset_form_valid, last_name='', email='jane', postcode='')
+
+revealing_form_valid = {
+    'show': 'on', 'hidden_at_first': 'revealed',
+    'choices': 'b', 'choices_b': '3',
+    'multi_choices': ['a', 'b'], 'multi_choices_a': 'Because', 'multi_choices_b': 'Specifically',
+}
+revealing_form_invalid = {
+    'show': 'on', 'hidden_at_first': '',
+    'choices': 'd', 'choices_d_0': '31', 'choices_d_1': '2', 'choices_d_2': '2018',
+    'multi_choices': ['b'], 'multi_choices_b': '',
+}
+
+many_dates_invalid = {
+    'start_0_0': '31', 'start_0_1': '2', 'start_0_2': '2018',
+    'start_1_0': '1', 'start_1_1': '13', 'start_1_2': '18',
+    'start_2_0': '1', 'start_2_1': '2', 'start_2_2': '2018',
+    'year_0': '1800', 'year_1': '99',
+}
+
+scenarios = [
+    Scenario('long-unbound', LongForm),
+    Scenario('long-valid', LongForm, data=long_form_valid, files=long_form_files),
+    Scenario('long-errors', LongForm, data=long_form_invalid, files={}),
+    Scenario('long-prefilled', LongForm, initial=long_form_initial),
+    Scenario('fieldsets-unbound', FieldsetForm),
+    Scenario('fieldsets-valid', FieldsetForm, data=fieldset_form_valid),
+    Scenario('fieldsets-errors', FieldsetForm, data=fieldset_form_invalid),
+    Scenario('fieldsets-prefilled', FieldsetForm, initial={'first_name': 'Jane', 'country': 'UK'}),
+    Scenario('revealing-unbound', RevealingForm),
+    Scenario('revealing-valid', RevealingForm, data=revealing_form_valid),
+    Scenario('revealing-errors', RevealingForm, data=revealing_form_invalid),
+    Scenario('revealing-prefilled', RevealingForm, initial={'choices': 'b'}),
+    Scenario('large-choices-unbound', LargeChoicesForm),
+    Scenario('large-choices-errors', LargeChoicesForm, data={'select': 'c100', 'check': ['c001', 'c299']}),
+    Scenario('many-dates-unbound', ManyDatesForm),
+    Scenario('many-dates-errors', ManyDatesForm, data=many_dates_invalid),
+]
+scenarios += [
+    Scenario('%s-compiled' % scenario.name, scenario.form_class,
+             data=scenario.data, files=scenario.files, initial=scenario.initial,
+             compiled_rendering=True)
+    for scenario in scenarios
+]
+scenarios += [
+    Scenario('long-unbound-fragment-cached', LongForm, fragment_caching=True),
+    Scenario('long-prefilled-fragment-cached', LongForm, initial=long_form_initial, fragment_caching=True),
+]
+
+
+@contextlib.contextmanager
+def count_template_renders():
+    """
+    Counts Django template renders (including `include` tags) by template name
+    """
+    counter = collections.Counter()
+    original_render = Template._render
+
+    def _render(template, context):
+        counter[template.origin.template_name if template.origin else template.name] += 1
+        return original_render(template, context)
+
+    Template._render = _render
+    try:
+        yield counter
+    finally:
+        Template._render = original_render
+
+
+@contextlib.contextmanager
+def count_function_calls():
+    """
+    Counts python function calls by qualified name (C functions and methods are not counted)
+    """
+    counter = collections.Counter()
+
+    def profile(frame, event, arg):
+        if event == 'call':
+            code = frame.f_code
+            counter[getattr(code, 'co_qualname', code.co_name)] += 1
+
+    sys.setprofile(profile)
+    try:
+        yield counter
+    finally:
+        sys.setprofile(None)
+
+
+def percentile(ordered_values, fraction):
+    index = min(len(ordered_values) - 1, int(round(fraction * (len(ordered_values) - 1))))
+    return ordered_values[index]
+
+
+def measure(scenario, iterations=200, warmup=10):
+    for _ in range(warmup):
+        scenario.run(scenario.make_form())
+
+    timings = []
+    instantiation_timings = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            form = scenario.make_form()
+            instantiation_timings.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            scenario.run(form)
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    timings.sort()
+    instantiation_timings.sort()
+
+    form = scenario.make_form()
+    with count_template_renders() as template_renders:
+        output = scenario.run(form)
+
+    form = scenario.make_form()
+    with count_function_calls() as function_calls:
+        scenario.run(form)
+
+    form = scenario.make_form()
+    tracemalloc.start()
+    try:
+        start_memory, _ = tracemalloc.get_traced_memory()
+        scenario.run(form)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': percentile(timings, 0.5) * 1000,
+        'p90_ms': percentile(timings, 0.9) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'init_p50_ms': percentile(instantiation_timings, 0.5) * 1000,
+        'template_renders': sum(template_renders.values()),
+        'templates': dict(template_renders),
+        'function_calls': sum(function_calls.values()),
+        'functions': dict(function_calls.most_common(20)),
+        'peak_kib': (peak_memory - start_memory) / 1024,
+        'output_bytes': len(output.encode()),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Lists regressions of results against a saved baseline:
+    template render and function call counts must not grow while median latencies and memory may grow by `tolerance`
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        if result['template_renders'] > expected['template_renders']:
+            regressions.append('%s: template renders increased from %d to %d' % (
+                name, expected['template_renders'], result['template_renders'],
+            ))
+        if result['function_calls'] > expected.get('function_calls', result['function_calls']):
+            regressions.append('%s: function calls increased from %d to %d' % (
+                name, expected['function_calls'], result['function_calls'],
+            ))
+        for key in ('p50_ms', 'init_p50_ms', 'peak_kib'):
+            if key in expected and result[key] > expected[key] * (1 + tolerance):
+                regressions.append('%s: %s increased from %.3f to %.3f' % (
+                    name, key, expected[key], result[key],
+                ))
+    return regressions
@@ -0,0 +1,91 @@
+import fnmatch
+import json
+import os
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.utils import translation
+
+from demo_service.benchmarks import compare, measure, scenarios
+from govuk_forms.renderers import get_form_renderer
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks rendering of the demo forms and compares results with a saved baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Timed renders per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed renders per scenario')
+        parser.add_argument('--scenario', action='append', dest='scenarios', default=[],
+                            help='Only run scenarios matching this pattern, e.g. "long-*"')
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmark-baseline.json'),
+                            help='Path to baseline file')
+        parser.add_argument('--save', action='store_true', help='Save results as the new baseline')
+        parser.add_argument('--compare', action='store_true', help='Fail if results regress from the baseline')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed fractional increase in latency and memory when comparing')
+        parser.add_argument('--renderer',
+                            help='Form renderer class for GOV.UK forms, e.g. django.forms.renderers.Jinja2')
+        parser.add_argument('--debug', action='store_true',
+                            help='Keep DEBUG setting, otherwise templates are cached as in production')
+
+    def handle(self, *args, **options):
+        if not options['debug']:
+            # must be set before the form renderer creates its template engine
+            settings.DEBUG = False
+        if options['renderer']:
+            settings.GOVUK_FORMS_RENDERER = options['renderer']
+            get_form_renderer.cache_clear()
+
+        selected_scenarios = [
+            scenario
+            for scenario in scenarios
+            if not options['scenarios'] or any(fnmatch.fnmatch(scenario.name, pattern)
+                                               for pattern in options['scenarios'])
+        ]
+        if not selected_scenarios:
+            raise CommandError('No scenarios selected')
+
+        results = {}
+        self.stdout.write('%-32s %9s %9s %9s %9s %10s %10s %10s %10s' % (
+            'scenario', 'init ms', 'p50 ms', 'p90 ms', 'p99 ms', 'templates', 'calls', 'peak KiB', 'bytes',
+        ))
+        with translation.override(settings.LANGUAGE_CODE):
+            for scenario in selected_scenarios:
+                result = measure(scenario, iterations=options['iterations'], warmup=options['warmup'])
+                results[scenario.name] = result
+                self.stdout.write('%-32s %9.3f %9.3f %9.3f %9.3f %10d %10d %10.1f %10d' % (
+                    scenario.name, result['init_p50_ms'], result['p50_ms'], result['p90_ms'], result['p99_ms'],
+                    result['template_renders'], result['function_calls'], result['peak_kib'], result['output_bytes'],
+                ))
+                if options['verbosity'] > 1:
+                    for template_name, count in sorted(result['templates'].items()):
+                        self.stdout.write('    %5d × %s' % (count, template_name))
+                    for function_name, count in sorted(result['functions'].items(), key=lambda item: -item[1]):
+                        self.stdout.write('    %5d calls of %s' % (count, function_name))
+
+        if options['compare']:
+            self.compare(results, options['baseline'], options['tolerance'])
+        if options['save']:
+            self.save(results, options['baseline'])
+
+    def compare(self, results, baseline_path, tolerance):
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            raise CommandError('Baseline %s does not exist, create it using --save' % baseline_path)
+        regressions = compare(results, baseline, tolerance)
+        if regressions:
+            raise CommandError('Regressions found:\n%s' % '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions found'))
+
+    def save(self, results, baseline_path):
+        baseline = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        self.stdout.write('Saved baseline to %s' % baseline_path)
@@ -3,10 +3,12 @@ from functools import partial
 from random import choice
 
 from django.conf.urls import url
+from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views.generic import FormView
 
 from demo_service.forms import SimpleForm, LongForm, FieldsetForm, RevealingForm
+from govuk_forms.journeys import JourneyView
 
 random_option = partial(choice, ['a', 'b'])
 random_separated = partial(choice, ['a', 'b', 'c', 'd', 'e'])
@@ -20,6 +22,18 @@ class FakeFile:
         return 'file.txt'
 
 
+class DemoJourney(JourneyView):
+    template_name = 'demo_service/journey.html'
+    steps = (
+        ('contact', SimpleForm),
+        ('address', FieldsetForm),
+        ('options', RevealingForm),
+    )
+
+    def done(self, cleaned_data):
+        return redirect('demo:journey')
+
+
 app_name = 'demo'
 view = partial(FormView.as_view, template_name='demo_service/demo.html')
 urlpatterns = [
@@ -45,4 +59,6 @@ urlpatterns = [
     url(r'^revealing/$', view(form_class=RevealingForm, success_url=reverse_lazy('demo:revealing'), initial={
         'choices': 'b',
     }), name='revealing'),
+    url(r'^journey/$', DemoJourney.as_view(), name='journey'),
+    url(r'^journey/(?P<step>[a-z-]+)/$', DemoJourney.as_view(), name='journey'),
 ]
@@ -1,6 +1,7 @@
 from settings import *  # noqa
 
 DATABASES = {}
+SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
 
 GOVUK_SERVICE_SETTINGS = {
     'name': 'Demo service',
@@ -11,5 +12,6 @@ GOVUK_SERVICE_SETTINGS = {
         {'name': 'Pre-filled', 'link': 'demo:prefilled', 'link_is_view_name': True},
         {'name': 'Field sets', 'link': 'demo:fieldsets', 'link_is_view_name': True},
         {'name': 'Conditionally revealed', 'link': 'demo:revealing', 'link_is_view_name': True},
+        {'name': 'Journey', 'link': 'demo:journey', 'link_is_view_name': True},
     ],
 }
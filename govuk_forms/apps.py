@@ -1,7 +1,81 @@
+import logging
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.utils import timezone, translation
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 
+logger = logging.getLogger('govuk_forms.apps')
+
 
 class FormsAppConfig(AppConfig):
     name = 'govuk_forms'
     verbose_name = _('GOV.UK Forms')
+
+    # rendered by django-debug-toolbar rather than by form renderers
+    warm_up_excluded_templates = {'govuk_forms/profiling-panel.html'}
+
+    def ready(self):
+        from govuk_forms.forms import end_page, start_page
+
+        # error summary ids are unique within each response
+        request_started.connect(start_page, dispatch_uid='govuk_forms.start_page')
+        request_finished.connect(end_page, dispatch_uid='govuk_forms.end_page')
+        if getattr(settings, 'GOVUK_FORMS_WARM_UP', False):
+            self.warm_up(getattr(settings, 'GOVUK_FORMS_WARM_UP_FORMS', ()))
+
+    def get_template_names(self):
+        from govuk_forms.renderers import builders
+
+        template_names = set(builders)
+        template_dir = os.path.join(self.path, 'templates')
+        for path, directory_names, file_names in os.walk(os.path.join(template_dir, 'govuk_forms')):
+            template_names.update(
+                os.path.relpath(os.path.join(path, file_name), template_dir).replace(os.sep, '/')
+                for file_name in file_names
+                if file_name.endswith('.html')
+            )
+        return sorted(template_names - self.warm_up_excluded_templates)
+
+    def warm_up(self, form_classes=()):
+        """
+        Loads and parses templates of GOV.UK forms, loads the default time zone and renders form classes
+        (or their dotted paths) once, unbound and with errors, so that first requests do not;
+        servers that load the application before forking workers (e.g. gunicorn --preload) then share this work.
+        Templates are only kept if the form renderer caches them, as django's does when DEBUG is off.
+        This runs in `ready()` for every management command too (e.g. `migrate` on an empty database),
+        so forms that query the database when created or rendered, e.g. with ModelChoiceField choices,
+        should not be listed; forms that fail are logged and skipped
+        """
+        from govuk_forms.renderers import get_compiled_renderer, get_form_renderer
+
+        if settings.USE_TZ:
+            # cleaning of date-time fields otherwise loads the time zone database in first requests
+            timezone.get_default_timezone()
+
+        renderer = get_form_renderer()
+        compiled_renderer = get_compiled_renderer(renderer)
+        for template_name in self.get_template_names():
+            renderer.get_template(template_name)
+            compiled_renderer.get_builder(template_name)
+
+        # activating a language loads its translation catalogues
+        with translation.override(settings.LANGUAGE_CODE):
+            for form_class in form_classes:
+                try:
+                    self.warm_up_form(form_class)
+                except Exception:
+                    logger.warning('Could not warm up form %s', form_class, exc_info=True)
+
+    def warm_up_form(self, form_class):
+        if isinstance(form_class, str):
+            form_class = import_string(form_class)
+        form = form_class()
+        form.as_div()
+        form.submit_button()
+        form = form_class(data={})
+        form.error_summary()
+        form.as_div()
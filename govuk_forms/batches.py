@@ -0,0 +1,108 @@
+import collections
+import concurrent.futures
+import itertools
+
+from django.utils import translation
+from django.utils.encoding import force_text
+
+# `row` is the position of the data in the validated iterable and `errors` maps field names
+# (or `__all__` for non-field errors) to lists of messages; both are plain values so they can cross processes
+BatchResult = collections.namedtuple('BatchResult', ('row', 'cleaned_data', 'errors'))
+
+
+def copy_field(field):
+    # as `Field.__deepcopy__` but sharing the widget, which validation does not change
+    field_copy = field.__class__.__new__(field.__class__)
+    field_copy.__dict__.update(field.__dict__)
+    field_copy.error_messages = field.error_messages.copy()
+    field_copy.validators = field.validators[:]
+    return field_copy
+
+
+class BatchValidator:
+    """
+    Validates many rows of submitted data with the same rules as a form class, reusing one form instance
+    (and so its deep-copied widgets and conditional reveal index) rather than instantiating a form per row.
+    Each row is cleaned with fresh copies of the fields as they were after the form's `__init__`, so changes that
+    `clean` methods make to fields do not carry over to later rows; forms whose `__init__` changes fields according
+    to bound data, or whose `clean` methods keep other state on the form, should be validated individually
+    """
+
+    def __init__(self, form_class, **form_kwargs):
+        self.form_class = form_class
+        self.form_kwargs = form_kwargs
+        self.form = form_class(data={}, **form_kwargs)
+        if hasattr(self.form, 'get_reveal_index'):
+            # conditionally revealed fields of instance overrides are made optional before fields are copied
+            self.form.get_reveal_index()
+        self.fields = self.form.fields
+
+    def bind(self, data):
+        form = self.form
+        form.fields = self.fields.__class__(
+            (name, copy_field(field))
+            for name, field in self.fields.items()
+        )
+        form.data = data
+        form.files = {}
+        form._errors = None
+        form._bound_fields_cache = {}
+        for attribute in ('cleaned_data', 'changed_data'):
+            form.__dict__.pop(attribute, None)
+        return form
+
+    def validate(self, data, row=None):
+        form = self.bind(data)
+        errors = {
+            name: [force_text(message) for message in messages]
+            for name, messages in form.errors.items()
+        }
+        return BatchResult(row=row, cleaned_data=dict(form.cleaned_data), errors=errors)
+
+    def iter_validate(self, rows, start=0):
+        for row, data in enumerate(rows, start=start):
+            yield self.validate(data, row=row)
+
+
+def validate_chunk(form_class, form_kwargs, language, start, rows):
+    # runs in pool workers so must be importable and only take picklable arguments
+    with translation.override(language):
+        return list(BatchValidator(form_class, **form_kwargs).iter_validate(rows, start=start))
+
+
+def iter_chunks(rows, chunk_size):
+    rows = iter(rows)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def validate_batch(form_class, rows, workers=None, chunk_size=200, **form_kwargs):
+    """
+    Yields a `BatchResult` for every data dict in `rows`, in order, as validated by `form_class`;
+    rows are consumed lazily so very large iterables can be streamed.
+    With `workers`, chunks of rows are validated in a process pool: the form class, form keyword arguments,
+    rows and cleaned values must be picklable and worker processes must have django configured
+    (as they do when forked)
+    """
+    if not workers:
+        yield from BatchValidator(form_class, **form_kwargs).iter_validate(rows)
+        return
+
+    language = translation.get_language()
+    chunks = iter_chunks(rows, chunk_size)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        # a bounded number of chunks is submitted ahead so that results stream and memory stays flat
+        pending = collections.deque(
+            executor.submit(validate_chunk, form_class, form_kwargs, language, start, chunk)
+            for start, chunk in itertools.islice(chunks, workers * 2)
+        )
+        while pending:
+            results = pending.popleft().result()
+            for start, chunk in itertools.islice(chunks, 1):
+                pending.append(executor.submit(validate_chunk, form_class, form_kwargs, language, start, chunk))
+            yield from results
@@ -0,0 +1,93 @@
+import datetime
+import decimal
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.timezone import get_current_timezone_name
+from django.utils.translation import get_language
+
+import govuk_forms
+
+# initial values which can be reliably represented in cache keys
+simple_types = (str, int, float, decimal.Decimal, datetime.date, datetime.time, datetime.timedelta, type(None))
+
+
+def is_simple_value(value):
+    if isinstance(value, (list, tuple)):
+        return all(is_simple_value(item) for item in value)
+    return isinstance(value, simple_types)
+
+
+def fragment_caching_enabled():
+    return getattr(settings, 'GOVUK_FORMS_FRAGMENT_CACHING', True)
+
+
+def get_fragment_cache():
+    return caches[getattr(settings, 'GOVUK_FORMS_FRAGMENT_CACHE', 'default')]
+
+
+def class_path(cls):
+    return '%s.%s' % (cls.__module__, cls.__qualname__)
+
+
+def get_version_key(form_class):
+    return 'govuk_forms:fragments:version:%s' % class_path(form_class)
+
+
+def get_version_keys(form_class):
+    # fragments of a form class are invalidated along with those of its base classes
+    return [
+        get_version_key(cls)
+        for cls in form_class.__mro__
+        if getattr(cls, 'fragment_caching', None) is not None
+    ]
+
+
+def get_fragment_key(form, fragment_name, *args):
+    """
+    Returns a cache key for a rendered fragment of an unbound form, or None if it cannot be cached
+    because initial data is not simple (e.g. model instances) or rendering attributes were changed on the instance
+    """
+    if form.render_plan_attributes.intersection(form.__dict__):
+        return None
+    initial = []
+    for name, field in form.fields.items():
+        value = form.get_initial_for_field(field, name)
+        if not is_simple_value(value):
+            return None
+        initial.append((name, type(value).__name__, value))
+    cache = get_fragment_cache()
+    version_keys = get_version_keys(type(form))
+    versions = cache.get_many(version_keys)
+    if len(versions) < len(version_keys):
+        # versions that are not known, e.g. evicted from the cache, cannot be reused
+        new_versions = {
+            version_key: new_version()
+            for version_key in version_keys
+            if version_key not in versions
+        }
+        cache.set_many(new_versions, None)
+        versions.update(new_versions)
+    key_parts = (
+        class_path(type(form)), sorted(versions.items()), form.fragment_cache_version, govuk_forms.__version__,
+        # aware date-times are output in the current time zone
+        get_language(), get_current_timezone_name(), class_path(type(form.renderer)),
+        form.prefix, form.auto_id, form.label_suffix, form.use_required_attribute, initial, args,
+    )
+    return 'govuk_forms:fragments:%s:%s' % (
+        fragment_name,
+        hashlib.sha1(repr(key_parts).encode()).hexdigest(),
+    )
+
+
+def new_version():
+    return '%d' % (time.time() * 1000000)
+
+
+def invalidate_fragments(form_class):
+    """
+    Invalidates cached fragments of a form class and its subclasses
+    """
+    get_fragment_cache().set(get_version_key(form_class), new_version(), None)
@@ -0,0 +1,235 @@
+"""
+Columnar cleaning of many date and year values at once, for instance when checking bulk uploads,
+applying the same built-in rules as `SplitDateField` and `YearField`.
+Uses NumPy when it is installed and plain python otherwise
+"""
+import datetime
+
+from django.core.exceptions import ValidationError
+from django.utils.encoding import force_text
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# values beyond this are clipped which is enough to compare them with field bounds
+integer_limit = 2 ** 62
+subfield_names = ('day', 'month', 'year')
+
+
+def parse_integer(field, value):
+    """
+    Returns an integer, None if empty, or raises ValidationError as an IntegerField's `to_python` would
+    """
+    if isinstance(value, str) and value.isdecimal() and len(value) < 10:
+        return int(value)
+    if value in field.empty_values:
+        return None
+    return max(-integer_limit, min(integer_limit, field.to_python(value)))
+
+
+def check_bounds(field, value):
+    if field.max_value is not None and value > field.max_value:
+        return 'max_value'
+    if field.min_value is not None and value < field.min_value:
+        return 'min_value'
+    return None
+
+
+def get_error_message(field, code):
+    message = field.error_messages[code]
+    if code in ('min_value', 'max_value'):
+        message = message % {'limit_value': getattr(field, code)}
+    return force_text(message)
+
+
+def clean_integer(field, value, year_field=None):
+    """
+    Returns (integer or None, error code or None) for one value
+    """
+    try:
+        value = parse_integer(field, value)
+    except ValidationError:
+        return None, 'invalid'
+    if value is None:
+        return None, None
+    if year_field is not None:
+        value = year_field.convert_era(value)
+    return value, check_bounds(field, value)
+
+
+def clean_date_row(field, values):
+    """
+    Returns (date or None, tuple of error codes) for one row of day, month and year values
+    """
+    empty = [value in field.empty_values for value in values]
+    if all(empty) and not field.required:
+        return None, ()
+    if any(empty) and field.required:
+        return None, ('required',)
+    numbers = []
+    codes = []
+    for subfield_name, subfield, value in zip(subfield_names, field.fields, values):
+        number, code = clean_integer(subfield, value, subfield if subfield_name == 'year' else None)
+        numbers.append(number)
+        if code:
+            codes.append('%s_%s' % (subfield_name, code))
+    if codes:
+        return None, tuple(codes)
+    try:
+        if None in numbers:
+            raise ValueError
+        return datetime.date(numbers[2], numbers[1], numbers[0]), ()
+    except ValueError:
+        return None, ('invalid',)
+
+
+def parse_integer_array(field, values):
+    """
+    Returns an integer array, a mask of empty values and a mask of values that are not integers;
+    plain digit strings are converted by NumPy while anything else is parsed as the field would
+    """
+    values = list(values)
+    strings = numpy.asarray(values, dtype=str)
+    numbers = numpy.zeros(len(values), dtype=numpy.int64)
+    empty = numpy.zeros(len(values), dtype=bool)
+    invalid = numpy.zeros(len(values), dtype=bool)
+    if not values:
+        return numbers, empty, invalid
+    simple = numpy.char.isdecimal(strings) & (numpy.char.str_len(strings) < 10)
+    numbers[simple] = strings[simple].astype(numpy.int64)
+    for index in numpy.flatnonzero(~simple):
+        try:
+            number = parse_integer(field, values[index])
+        except ValidationError:
+            invalid[index] = True
+            continue
+        if number is None:
+            empty[index] = True
+        else:
+            numbers[index] = number
+    return numbers, empty, invalid
+
+
+def bounds_errors(field, numbers, valid):
+    """
+    Returns masks of valid values above and below the field's bounds
+    """
+    too_high = numpy.zeros(len(numbers), dtype=bool)
+    too_low = numpy.zeros(len(numbers), dtype=bool)
+    if field.max_value is not None:
+        too_high = valid & (numbers > field.max_value)
+    if field.min_value is not None:
+        too_low = valid & ~too_high & (numbers < field.min_value)
+    return too_high, too_low
+
+
+def convert_era_array(year_field, years, valid):
+    short = valid & (years < 100)
+    years = years.copy()
+    years[short & (years > year_field.era_boundary)] += year_field.century - 100
+    years[short & (years <= year_field.era_boundary)] += year_field.century
+    return years
+
+
+def days_in_months(years, months):
+    leap = (years % 4 == 0) & ((years % 100 != 0) | (years % 400 == 0))
+    month_lengths = numpy.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+    return month_lengths[numpy.clip(months, 0, 12)] + ((months == 2) & leap)
+
+
+def clean_date_arrays(field, days, months, years):
+    columns = []
+    for subfield_name, subfield, values in zip(subfield_names, field.fields, (days, months, years)):
+        numbers, empty, invalid = parse_integer_array(subfield, values)
+        valid = ~empty & ~invalid
+        if subfield_name == 'year':
+            numbers = convert_era_array(subfield, numbers, valid)
+        too_high, too_low = bounds_errors(subfield, numbers, valid)
+        errors = (('invalid', invalid), ('max_value', too_high), ('min_value', too_low))
+        columns.append((subfield_name, numbers, empty, errors))
+    (_, days, day_empty, _), (_, months, month_empty, _), (_, years, year_empty, _) = columns
+    all_empty = day_empty & month_empty & year_empty
+    any_empty = day_empty | month_empty | year_empty
+    required = (any_empty if field.required else numpy.zeros(len(days), dtype=bool))
+
+    subfield_errors = numpy.zeros(len(days), dtype=bool)
+    for _, _, _, errors in columns:
+        for _, mask in errors:
+            subfield_errors |= mask
+    subfield_errors &= ~required & ~all_empty
+
+    complete = ~any_empty & ~subfield_errors
+    impossible = complete & (
+        (months < 1) | (months > 12) | (days < 1) | (years < datetime.MINYEAR) | (years > datetime.MAXYEAR)
+        | (days > days_in_months(years, months))
+    )
+    invalid = (any_empty & ~all_empty & ~required & ~subfield_errors) | impossible
+    valid = complete & ~impossible
+
+    dates = numpy.full(len(days), numpy.datetime64('NaT'), dtype='M8[D]')
+    dates[valid] = (
+        (years[valid] - 1970).astype('M8[Y]').astype('M8[M]') + (months[valid] - 1).astype('m8[M]')
+    ).astype('M8[D]') + (days[valid] - 1).astype('m8[D]')
+
+    error_codes = [()] * len(days)
+    for index in numpy.flatnonzero(required):
+        error_codes[index] = ('required',)
+    for index in numpy.flatnonzero(invalid):
+        error_codes[index] = ('invalid',)
+    for index in numpy.flatnonzero(subfield_errors):
+        error_codes[index] = tuple(
+            '%s_%s' % (subfield_name, code)
+            for subfield_name, _, _, errors in columns
+            for code, mask in errors
+            if mask[index]
+        )
+    return dates.tolist(), error_codes
+
+
+def clean_date_columns(field, days, months, years, use_numpy=True):
+    """
+    Cleans equal-length sequences of day, month and year values with a SplitDateField's built-in rules;
+    returns a list of dates (None where invalid or empty) and a list of error code tuples,
+    see `SplitDateField.get_error_messages`
+    """
+    if numpy is not None and use_numpy:
+        return clean_date_arrays(field, days, months, years)
+    dates = []
+    error_codes = []
+    for values in zip(days, months, years):
+        date, codes = clean_date_row(field, values)
+        dates.append(date)
+        error_codes.append(codes)
+    return dates, error_codes
+
+
+def clean_year_column(field, values, use_numpy=True):
+    """
+    Cleans a sequence of year values with a YearField's built-in rules;
+    returns a list of years (None where invalid or empty) and a list of error codes (None if valid)
+    """
+    if numpy is None or not use_numpy:
+        years = []
+        error_codes = []
+        for value in values:
+            year, code = clean_integer(field, value, field)
+            if year is None and code is None and field.required:
+                code = 'required'
+            years.append(None if code else year)
+            error_codes.append(code)
+        return years, error_codes
+
+    numbers, empty, invalid = parse_integer_array(field, values)
+    valid = ~empty & ~invalid
+    numbers = convert_era_array(field, numbers, valid)
+    too_high, too_low = bounds_errors(field, numbers, valid)
+    required = empty if field.required else numpy.zeros(len(numbers), dtype=bool)
+    error_codes = numpy.full(len(numbers), None, dtype=object)
+    for code, mask in (('required', required), ('invalid', invalid), ('max_value', too_high),
+                       ('min_value', too_low)):
+        error_codes[mask] = code
+    years = numbers.astype(object)
+    years[empty | invalid | too_high | too_low] = None
+    return years.tolist(), error_codes.tolist()
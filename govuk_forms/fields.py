@@ -1,13 +1,43 @@
+import copy
 import datetime
+import functools
 
 from django import forms
 from django.core.exceptions import ValidationError
+from django.utils.functional import lazy
 from django.utils.timezone import now
-from django.utils.translation import gettext, gettext_lazy as _
+from django.utils.translation import get_language, gettext, gettext_lazy as _
 
+from govuk_forms import columnar
 from govuk_forms.widgets import SplitDateWidget, SplitHiddenDateWidget
 
 
+@functools.lru_cache(maxsize=64)
+def format_year_bounds_error(current_year, language):
+    return gettext('Year should be between 1900 and %(current_year)s.') % {'current_year': current_year}
+
+
+# translated when the message is output rather than when fields are created
+year_bounds_error = lazy(lambda current_year: format_year_bounds_error(current_year, get_language()), str)
+
+
+@functools.lru_cache(maxsize=8)
+def get_year_options(current_year):
+    """
+    Options shared by year fields created in the same year
+    """
+    bounds_error = year_bounds_error(current_year)
+    return {
+        'min_value': 1900,
+        'max_value': current_year,
+        'error_messages': {
+            'min_value': bounds_error,
+            'max_value': bounds_error,
+            'invalid': _('Enter year as a number.'),
+        }
+    }
+
+
 class YearField(forms.IntegerField):
     """
     In integer field that accepts years between 1900 and now
@@ -21,29 +51,46 @@ class YearField(forms.IntegerField):
             # 2-digit dates are a minimum of 10 years ago by default
             era_boundary = self.current_year - self.century - 10
         self.era_boundary = era_boundary
-        bounds_error = gettext('Year should be between 1900 and %(current_year)s.') % {
-            'current_year': self.current_year
-        }
-        options = {
-            'min_value': 1900,
-            'max_value': self.current_year,
-            'error_messages': {
-                'min_value': bounds_error,
-                'max_value': bounds_error,
-                'invalid': gettext('Enter year as a number.'),
-            }
-        }
-        options.update(kwargs)
+        options = dict(get_year_options(self.current_year), **kwargs)
         super().__init__(**options)
 
     def clean(self, value):
         value = self.to_python(value)
-        if isinstance(value, int) and value < 100:
+        if isinstance(value, int):
+            value = self.convert_era(value)
+        return super().clean(value)
+
+    def convert_era(self, value):
+        if value < 100:
             if value > self.era_boundary:
                 value += self.century - 100
             else:
                 value += self.century
-        return super().clean(value)
+        return value
+
+    def clean_column(self, values):
+        """
+        Cleans many values at once returning a list of years and a list of error codes (None where valid),
+        see `columnar.clean_year_column`
+        """
+        return columnar.clean_year_column(self, values)
+
+    def get_error_message(self, code):
+        return columnar.get_error_message(self, code)
+
+
+day_bounds_error = _('Day should be between 1 and 31.')
+day_error_messages = {
+    'min_value': day_bounds_error,
+    'max_value': day_bounds_error,
+    'invalid': _('Enter day as a number.'),
+}
+month_bounds_error = _('Month should be between 1 and 12.')
+month_error_messages = {
+    'min_value': month_bounds_error,
+    'max_value': month_bounds_error,
+    'invalid': _('Enter month as a number.'),
+}
 
 
 class SplitDateField(forms.MultiValueField):
@@ -54,25 +101,26 @@ class SplitDateField(forms.MultiValueField):
     }
 
     def __init__(self, *args, **kwargs):
-        day_bounds_error = gettext('Day should be between 1 and 31.')
-        month_bounds_error = gettext('Month should be between 1 and 12.')
-
         self.fields = [
-            forms.IntegerField(min_value=1, max_value=31, error_messages={
-                'min_value': day_bounds_error,
-                'max_value': day_bounds_error,
-                'invalid': gettext('Enter day as a number.')
-            }),
-            forms.IntegerField(min_value=1, max_value=12, error_messages={
-                'min_value': month_bounds_error,
-                'max_value': month_bounds_error,
-                'invalid': gettext('Enter month as a number.')
-            }),
+            forms.IntegerField(min_value=1, max_value=31, error_messages=day_error_messages),
+            forms.IntegerField(min_value=1, max_value=12, error_messages=month_error_messages),
             YearField(),
         ]
 
         super().__init__(self.fields, *args, **kwargs)
 
+    def __deepcopy__(self, memo):
+        # fields for date parts are copied without their widgets as those are never rendered,
+        # SplitDateField's own widget is used instead
+        result = super(forms.MultiValueField, self).__deepcopy__(memo)
+        result.fields = []
+        for field in self.fields:
+            field_copy = copy.copy(field)
+            field_copy.error_messages = field.error_messages.copy()
+            field_copy.validators = field.validators[:]
+            result.fields.append(field_copy)
+        return result
+
     def compress(self, data_list):
         if data_list:
             try:
@@ -83,6 +131,29 @@ class SplitDateField(forms.MultiValueField):
                 raise ValidationError(self.error_messages['invalid'], code='invalid')
         return None
 
+    def clean_columns(self, days, months, years):
+        """
+        Cleans many dates at once given sequences of day, month and year values,
+        returning a list of dates and a list of error code tuples, see `columnar.clean_date_columns`
+        """
+        return columnar.clean_date_columns(self, days, months, years)
+
+    def get_error_messages(self, error_codes):
+        """
+        Returns the messages that `clean` would raise for error codes returned by `clean_columns`
+        """
+        messages = []
+        for code in error_codes:
+            subfield_name, _, subfield_code = code.partition('_')
+            if subfield_name in columnar.subfield_names:
+                field, code = self.fields[columnar.subfield_names.index(subfield_name)], subfield_code
+            else:
+                field = self
+            message = columnar.get_error_message(field, code)
+            if message not in messages:
+                messages.append(message)
+        return messages
+
     def widget_attrs(self, widget):
         attrs = super().widget_attrs(widget)
         if not isinstance(widget, SplitDateWidget):
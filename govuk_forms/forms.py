@@ -1,21 +1,350 @@
-from collections import OrderedDict
+import asyncio
+import copy
+import threading
+from collections import Counter, OrderedDict
 
 from django import forms
 from django.core.exceptions import ValidationError
-from django.utils.crypto import get_random_string
+from django.forms.forms import DeclarativeFieldsMetaclass
+from django.forms.utils import ErrorDict
 from django.utils.encoding import force_text
-from django.utils.html import conditional_escape, format_html_join
+from django.utils.functional import cached_property
+from django.utils.html import conditional_escape, format_html, format_html_join
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
-from govuk_forms import widgets as govuk_widgets
+from govuk_forms import caching, validation, widgets as govuk_widgets
+from govuk_forms.profiling import get_active_profile
+from govuk_forms.renderers import get_compiled_renderer, get_form_renderer
 
+try:
+    from asgiref.local import Local
+except ImportError:  # django < 3.0
+    Local = threading.local
 
-class GOVUKForm(forms.Form):
+# error summary ids output while handling the current request, see `GOVUKForm.get_error_summary_id`;
+# reset by request signals connected in `FormsAppConfig.ready`
+page_state = Local()
+
+
+def start_page(**kwargs):
+    page_state.error_summary_ids = set()
+
+
+def end_page(**kwargs):
+    page_state.error_summary_ids = None
+
+
+class FieldRenderPlan:
+    """
+    Static rendering details of a form field which do not depend on bound data
+    """
+
+    def __init__(self, form, name, field):
+        widget = field.widget
+        widget_group_classes = getattr(widget, 'field_group_classes', '')
+        self.group_template_name = form.get_group_template_name(widget)
+        self.group_classes = tuple(('%s %s' % (form.field_group_classes, widget_group_classes)).split())
+        self.panel_group_classes = tuple(('%s %s' % (form.field_group_panel_classes, widget_group_classes)).split())
+        self.label_classes = form.field_label_classes.strip()
+        self.help_classes = form.field_help_classes.strip()
+        self.input_error_classes = getattr(widget, 'input_error_classes', 'form-control-error')
+        self.accepts_render_context = getattr(widget, 'accepts_render_context', False)
+        self.reveals_conditionally = tuple(form.get_reveal_index().triggers.get(name, {}).items())
+        self.inherit_label_from_field = getattr(widget, 'inherit_label_from_field', False)
+
+
+class RenderPlan:
+    """
+    Static rendering details of a form which do not depend on bound data;
+    rows are (is_fieldset, legend, field names) in output order
+    """
+
+    def __init__(self, form):
+        self.conditionally_revealed = tuple(form.get_reveal_index().required)
+        included_fields = set(self.conditionally_revealed)
+        self.rows = []
+        for legend, field_names in form.fieldsets:
+            self.rows.append((True, legend, tuple(
+                field_name
+                for field_name in field_names
+                if field_name not in included_fields
+            )))
+            included_fields.update(field_names)
+        self.rows.extend(
+            (False, None, (name,))
+            for name in form.fields
+            if name not in included_fields
+        )
+        self.fields = {
+            name: FieldRenderPlan(form, name, field)
+            for name, field in form.fields.items()
+        }
+
+
+class RevealedPanel:
+    """
+    A conditionally-revealed field which is rendered into a panel only once
+    and only when a choice that reveals it is rendered
+    """
+
+    def __init__(self, form, name, render_state):
+        self.form = form
+        self.name = name
+        self.render_state = render_state
+
+    @property
+    def bound_field(self):
+        return self.render_state.get_bound_field(self.name)
+
+    @cached_property
+    def html(self):
+        return self.form.render_field(self.name, self.form.fields[self.name], in_panel=True,
+                                      render_state=self.render_state)
+
+
+class BoundFieldSnapshot:
+    """
+    Values of a bound field that are looked up once per render and given to group templates as `bound_field`;
+    other attributes are those of the bound field itself
+    """
+    __slots__ = ('bound_field', 'name', 'html_name', 'auto_id', 'label', 'is_hidden', 'field_errors')
+
+    def __init__(self, bound_field, field_errors=None):
+        self.bound_field = bound_field
+        self.name = bound_field.name
+        self.html_name = bound_field.html_name
+        self.auto_id = bound_field.auto_id
+        self.label = bound_field.label
+        self.is_hidden = bound_field.field.widget.is_hidden
+        self.field_errors = field_errors
+
+    def __getattr__(self, name):
+        if name == 'bound_field':
+            raise AttributeError(name)
+        return getattr(self.bound_field, name)
+
+    def __str__(self):
+        return str(self.bound_field)
+
+    def __html__(self):
+        return str(self.bound_field)
+
+    @property
+    def errors(self):
+        if self.field_errors is None:
+            return self.bound_field.errors
+        return self.field_errors
+
+    def css_classes(self, extra_classes=None):
+        # as `BoundField.css_classes` but without looking up errors again
+        # and keeping classes in order rather than in an order which depends on string hashing
+        if hasattr(extra_classes, 'split'):
+            extra_classes = extra_classes.split()
+        extra_classes = OrderedDict.fromkeys(extra_classes or [])
+        form = self.bound_field.form
+        if self.field_errors and hasattr(form, 'error_css_class'):
+            extra_classes[form.error_css_class] = None
+        if self.bound_field.field.required and hasattr(form, 'required_css_class'):
+            extra_classes[form.required_css_class] = None
+        return ' '.join(extra_classes)
+
+
+class RenderState:
+    """
+    Details of one render of a form, kept apart from the form and its widgets
+    so that they are not modified while rendering
+    """
+
+    def __init__(self, form):
+        self.form = form
+        self.render_plan = form.render_plan
+        self.revealed_panels = {}
+        self.bound_fields = {}
+        # rows can be rendered in several threads, see `GOVUKForm.as_div_async`
+        self.lock = threading.Lock()
+
+    def get_revealed_panel(self, names, trigger_name=None, index=0):
+        with self.lock:
+            revealed_panel = self.revealed_panels.get(names)
+            if revealed_panel is None:
+                if len(names) == 1:
+                    revealed_panel = RevealedPanel(self.form, names[0], self)
+                else:
+                    revealed_panel = RevealedGroup(self.form, names, self, trigger_name, index)
+                self.revealed_panels[names] = revealed_panel
+        return revealed_panel
+
+    def get_bound_field(self, name):
+        bound_field = self.bound_fields.get(name)
+        if bound_field is None:
+            # may be created twice when rendering concurrently, but either snapshot is the same
+            bound_field = BoundFieldSnapshot(self.form[name], self.form.error_index.get(name))
+            self.bound_fields[name] = bound_field
+        return bound_field
+
+
+class RevealedGroup:
+    """
+    Several fields revealed by one choice which are rendered together into a panel
+    """
+
+    def __init__(self, form, names, render_state, trigger_name, index):
+        self.form = form
+        self.names = names
+        self.render_state = render_state
+        self.auto_id = '%s_reveal_%d' % (render_state.get_bound_field(trigger_name).auto_id, index)
+
+    @property
+    def bound_field(self):
+        # templates refer to the revealed element by `bound_field.auto_id`
+        return self
+
+    @cached_property
+    def html(self):
+        context = {
+            'auto_id': self.auto_id,
+            'group_classes': ' '.join(self.form.field_group_panel_classes.split()),
+            'contents': format_html_join('\n\n', '{}', (
+                (self.form.render_field(name, self.form.fields[name], render_state=self.render_state),)
+                for name in self.names
+            )),
+        }
+        return mark_safe(self.form.renderer.render(self.form.revealed_group_template_name, context))
+
+
+class RevealIndex:
+    """
+    Conditional reveal details of a form: the fields revealed by each value of a choice field
+    and whether revealed fields were required; revealed fields can reveal further fields
+    """
+
+    def __init__(self, reveal_conditionally, fields, required=None):
+        self.reveal_conditionally = reveal_conditionally
+        self.triggers = OrderedDict()
+        self.required = OrderedDict()
+        for trigger_name, targets_by_value in reveal_conditionally.items():
+            self.triggers[trigger_name] = OrderedDict(
+                (value, (target_names,) if isinstance(target_names, str) else tuple(target_names))
+                for value, target_names in targets_by_value.items()
+            )
+            for target_names in self.triggers[trigger_name].values():
+                for target_name in target_names:
+                    if target_name in self.required:
+                        continue
+                    if required and target_name in required:
+                        self.required[target_name] = required[target_name]
+                    else:
+                        self.required[target_name] = target_name in fields and fields[target_name].required
+        self.root_triggers = tuple(
+            trigger_name
+            for trigger_name in self.triggers
+            if trigger_name not in self.required
+        )
+        self.multiple_choice = {
+            trigger_name
+            for trigger_name in self.triggers
+            if isinstance(fields.get(trigger_name), forms.MultipleChoiceField)
+        }
+
+    def get_dependencies(self, name):
+        """
+        Returns names of fields that decide whether a field is revealed and of fields that it reveals,
+        along with the field itself
+        """
+        dependencies = {name}
+        pending = [name]
+        while pending:
+            target_name = pending.pop()
+            for trigger_name, targets_by_value in self.triggers.items():
+                if trigger_name in dependencies:
+                    continue
+                if any(target_name in target_names for target_names in targets_by_value.values()):
+                    dependencies.add(trigger_name)
+                    pending.append(trigger_name)
+        pending = [name]
+        while pending:
+            for target_names in self.triggers.get(pending.pop(), {}).values():
+                for target_name in target_names:
+                    if target_name not in dependencies:
+                        dependencies.add(target_name)
+                        pending.append(target_name)
+        return dependencies
+
+    def iter_revealed(self, cleaned_data):
+        """
+        Yields names of fields revealed by chosen values, including those revealed by revealed fields
+        """
+        pending_triggers = list(self.root_triggers)
+        revealed = set()
+        while pending_triggers:
+            trigger_name = pending_triggers.pop(0)
+            if trigger_name not in cleaned_data:
+                # failed validation
+                continue
+            chosen_values = cleaned_data[trigger_name]
+            if trigger_name not in self.multiple_choice:
+                chosen_values = (chosen_values,)
+            targets_by_value = self.triggers[trigger_name]
+            for chosen_value in chosen_values or ():
+                try:
+                    target_names = targets_by_value.get(chosen_value, ())
+                except TypeError:
+                    # unhashable value cannot reveal fields
+                    continue
+                for target_name in target_names:
+                    if target_name in revealed:
+                        continue
+                    revealed.add(target_name)
+                    yield target_name
+                    if target_name in self.triggers:
+                        pending_triggers.append(target_name)
+
+
+class GOVUKFormMetaclass(DeclarativeFieldsMetaclass):
+    """
+    Replaces django widgets of a form class's fields once, when `auto_replace_widgets` is set,
+    and indexes conditionally revealed fields so that instances only need to copy the fields
+    """
+
+    def __new__(mcs, name, bases, attrs):
+        new_class = super().__new__(mcs, name, bases, attrs)
+        if new_class.auto_replace_widgets:
+            widget_replacements = govuk_widgets.widget_replacements
+            if hasattr(new_class, 'widget_replacements'):
+                widget_replacements = widget_replacements.copy()
+                widget_replacements.update(new_class.widget_replacements)
+            base_fields = OrderedDict()
+            for field_name, field in new_class.base_fields.items():
+                widget = govuk_widgets.replace_widget(field.widget, widget_replacements)
+                if widget is not field.widget:
+                    # fields can be shared with base classes so are copied before replacing widgets
+                    field = copy.deepcopy(field)
+                    field.widget = widget
+                base_fields[field_name] = field
+            new_class.base_fields = base_fields
+
+        # revealed fields are only validated as required once revealed
+        new_class.reveal_index = RevealIndex(new_class.reveal_conditionally, new_class.base_fields)
+        base_fields = OrderedDict(new_class.base_fields)
+        for target_name, required in new_class.reveal_index.required.items():
+            if required:
+                field = copy.deepcopy(base_fields[target_name])
+                field.required = False
+                base_fields[target_name] = field
+        new_class.base_fields = base_fields
+
+        # kept on the class so that plans are discarded with dynamically created form classes
+        new_class.render_plans = {}
+        return new_class
+
+
+class GOVUKForm(forms.Form, metaclass=GOVUKFormMetaclass):
     error_css_class = 'form-group-error'
     required_css_class = 'form-group-required'  # no default styling
 
     auto_replace_widgets = False
+    compiled_rendering = False  # built-in templates are output without the template engine
     group_template_names = govuk_widgets.group_template_names
 
     field_group_classes = 'form-group'
@@ -30,159 +359,406 @@ class GOVUKForm(forms.Form):
     submit_button_template_name = 'govuk_forms/submit-button.html'
 
     reveal_conditionally = {}
+    revealed_group_template_name = 'govuk_forms/revealed-group.html'
     fieldsets = ()
     fieldset_template_name = 'govuk_forms/fieldset.html'
 
+    # adds data attributes describing validation rules to widgets for client-side scripts,
+    # see also `get_validation_schema`
+    client_validation = False
+
+    # `as_div_async` renders in one thread, or splits fields into this many groups that are rendered concurrently
+    # in separate threads; rendering then must not use database connections, e.g. ModelChoiceField querysets
+    async_render_concurrency = 1
+
+    # a `govuk_forms.profiling.RenderProfile` to record field rendering in, otherwise the active one is used if any
+    render_profile = None
+
+    # unbound forms can be output from django's cache if fields do not change between instances,
+    # see `invalidate_fragment_cache`; disabled by GOVUK_FORMS_FRAGMENT_CACHING = False setting
+    fragment_caching = False
+    fragment_cache_timeout = 3600
+    fragment_cache_version = None
+
+    # render plans are shared by all instances of a form class with the same fields and widget types,
+    # unless one of these attributes is overridden on an instance; each class keeps its own `render_plans`
+    render_plan_attributes = {
+        'fieldsets', 'reveal_conditionally', 'group_template_names',
+        'field_group_classes', 'field_group_panel_classes', 'field_label_classes', 'field_help_classes',
+        'client_validation',
+    }
+
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('label_suffix', '')
+        if kwargs.get('renderer') is None and self.default_renderer is None:
+            kwargs['renderer'] = get_form_renderer()
         super().__init__(*args, **kwargs)
+        if self.compiled_rendering:
+            self.renderer = get_compiled_renderer(self.renderer)
 
-        if self.auto_replace_widgets:
-            widget_replacements = govuk_widgets.widget_replacements
-            if hasattr(self, 'widget_replacements'):
-                widget_replacements = widget_replacements.copy().update(self.widget_replacements)
-            for field in self.fields.values():
-                field.widget = govuk_widgets.replace_widget(field.widget, widget_replacements)
-
-        self.conditionally_revealed = {}
-        for target_fields in self.reveal_conditionally.values():
-            for target_field in target_fields.values():
-                field = self.fields[target_field]
-                self.conditionally_revealed[target_field] = {
-                    'required': field.required,
-                }
-                field.required = False
+        self.field_render_counts = Counter()
+        self.error_summary_count = 0
 
     def __str__(self):
         return self.as_div()
 
     def clean(self):
         super().clean()
-        for choice_field_name, details in self.reveal_conditionally.items():
-            chosen_value = self.cleaned_data.get(choice_field_name, object())
-            choice_field = self.fields[choice_field_name]
-            multi_choice = isinstance(choice_field, forms.MultipleChoiceField)
-            if not multi_choice:
-                chosen_value = [chosen_value]
-            for chosen_value in chosen_value:
-                target_field_name = details.get(chosen_value)
-                if not target_field_name:
-                    continue
-                conditionally_revealed = self.conditionally_revealed.get(target_field_name)
-                if not conditionally_revealed.get('required'):
-                    continue
-                target_value = self.cleaned_data[target_field_name]
-                target_field = self.fields[target_field_name]
-                if target_value in target_field.empty_values:
-                    self.add_error(target_field_name, ValidationError(target_field.error_messages['required'],
-                                                                      code='required'))
+        self.clean_revealed_fields()
         return self.cleaned_data
 
+    def clean_revealed_fields(self):
+        required = self.get_revealed_required()
+        for target_field_name in self.get_reveal_index().iter_revealed(self.cleaned_data):
+            if not required.get(target_field_name) or target_field_name not in self.cleaned_data:
+                # not required or already failed validation
+                continue
+            target_value = self.cleaned_data[target_field_name]
+            target_field = self.fields[target_field_name]
+            if target_value in target_field.empty_values:
+                self.add_error(target_field_name, ValidationError(target_field.error_messages['required'],
+                                                                  code='required'))
+
+    def partial_clean(self, field_names):
+        """
+        Cleans only some fields of a bound form, as `full_clean` would but without the form's `clean` method,
+        e.g. to validate one field with those related by conditional reveals;
+        `errors` and `cleaned_data` then only refer to these fields
+        """
+        if not self.is_bound:
+            return
+        self.__dict__.pop('error_index', None)
+        self._errors = ErrorDict()
+        self.cleaned_data = {}
+        for name, field in self.fields.items():
+            if name not in field_names:
+                continue
+            if field.disabled:
+                value = self.get_initial_for_field(field, name)
+            else:
+                value = field.widget.value_from_datadict(self.data, self.files, self.add_prefix(name))
+            try:
+                if isinstance(field, forms.FileField):
+                    value = field.clean(value, self.get_initial_for_field(field, name))
+                else:
+                    value = field.clean(value)
+                self.cleaned_data[name] = value
+                if hasattr(self, 'clean_%s' % name):
+                    self.cleaned_data[name] = getattr(self, 'clean_%s' % name)()
+            except ValidationError as e:
+                self.add_error(name, e)
+        self.clean_revealed_fields()
+
+    def render_field_group(self, name):
+        """
+        Renders a field (and fields it reveals) as it appears in `as_div`,
+        a conditionally revealed field is rendered as it appears in its panel
+        """
+        in_panel = any(
+            target_names == (name,)
+            for targets_by_value in self.get_reveal_index().triggers.values()
+            for target_names in targets_by_value.values()
+        )
+        return conditional_escape(self.render_field(name, self.fields[name], in_panel=in_panel))
+
+    def get_reveal_index(self):
+        if self.reveal_conditionally is self.reveal_index.reveal_conditionally:
+            return self.reveal_index
+        # overridden on the instance, so instance fields are made optional instead
+        reveal_index = self.__dict__.get('instance_reveal_index')
+        if reveal_index is None or reveal_index.reveal_conditionally is not self.reveal_conditionally:
+            reveal_index = RevealIndex(self.reveal_conditionally, self.fields, required=self.reveal_index.required)
+            for target_field_name in reveal_index.required:
+                if target_field_name in self.fields:
+                    self.fields[target_field_name].required = False
+            self.instance_reveal_index = reveal_index
+        return reveal_index
+
+    @property
+    def conditionally_revealed(self):
+        """
+        {field name: {'required': whether it is required once revealed}}, as kept by earlier versions;
+        changing or assigning it changes which revealed fields are required when cleaned
+        """
+        reveal_index = self.get_reveal_index()
+        stored = self.__dict__.get('instance_conditionally_revealed')
+        if stored is None or stored[0] not in (None, reveal_index):
+            stored = (reveal_index, OrderedDict(
+                (target_field_name, {'required': required})
+                for target_field_name, required in reveal_index.required.items()
+            ))
+            self.instance_conditionally_revealed = stored
+        return stored[1]
+
+    @conditionally_revealed.setter
+    def conditionally_revealed(self, conditionally_revealed):
+        # kept even if `reveal_conditionally` changes later
+        self.instance_conditionally_revealed = (None, conditionally_revealed)
+
+    def get_revealed_required(self):
+        # whether revealed fields are required, unless `conditionally_revealed` was used
+        if 'instance_conditionally_revealed' not in self.__dict__:
+            return self.get_reveal_index().required
+        return {
+            target_field_name: details.get('required', False)
+            for target_field_name, details in self.conditionally_revealed.items()
+        }
+
     def get_group_template_name(self, widget):
-        for widget_classes, template_name in self.group_template_names:
-            if isinstance(widget, widget_classes):
-                return template_name
-        raise ValueError('Cannot determine template name for widget %r' % widget)
+        template_name = govuk_widgets.find_group_template_name(widget.__class__, self.group_template_names)
+        if template_name is None:
+            raise ValueError('Cannot determine template name for widget %r' % widget)
+        return template_name
+
+    @property
+    def render_plan(self):
+        if self.render_plan_attributes.intersection(self.__dict__):
+            return RenderPlan(self)
+        key = tuple((name, type(field.widget)) for name, field in self.fields.items())
+        render_plan = self.render_plans.get(key)
+        if render_plan is None:
+            render_plan = RenderPlan(self)
+            self.render_plans[key] = render_plan
+        return render_plan
 
     def as_div(self):
-        rows = []
-        included_fields = set()
-        for field_name, conditionally_revealed in self.conditionally_revealed.items():
-            included_fields.add(field_name)
-            conditionally_revealed['html'] = self.render_field(field_name, self.fields[field_name], in_panel=True)
-        for legend, field_names in self.fieldsets:
-            included_fields.update(field_names)
+        return self.get_cached_fragment('as_div', lambda: mark_safe(''.join(self.iter_render())))
+
+    def iter_render(self):
+        """
+        Yields HTML for each fieldset or field group as it is rendered, e.g. for streaming responses;
+        joined together, it equals the output of `as_div`
+        """
+        render_state = RenderState(self)
+        separator = ''
+        for row in render_state.render_plan.rows:
+            yield separator + self.render_row(row, render_state)
+            separator = '\n\n'
+
+    def render_row(self, row, render_state):
+        is_fieldset, legend, field_names = row
+        if is_fieldset:
             context = {
                 'legend': legend,
                 'contents': format_html_join('\n\n', '{}', (
-                    (self.render_field(field_name, self.fields[field_name]),)
+                    (self.render_field(field_name, self.fields[field_name], render_state=render_state),)
                     for field_name in field_names
                 )),
             }
-            rows.append((mark_safe(self.renderer.render(self.fieldset_template_name, context)),))
-        rows.extend(
-            (self.render_field(name, field),)
-            for name, field in self.fields.items()
-            if name not in included_fields
-        )
-        return format_html_join('\n\n', '{}', rows)
+            html = mark_safe(self.renderer.render(self.fieldset_template_name, context))
+        else:
+            field_name = field_names[0]
+            html = self.render_field(field_name, self.fields[field_name], render_state=render_state)
+        return conditional_escape(html)
+
+    async def as_div_async(self):
+        """
+        Returns the output of `as_div` without blocking the event loop, e.g. in async views;
+        see `async_render_concurrency`
+        """
+        from asgiref.sync import sync_to_async
 
-    def render_field(self, name, field, in_panel=False):
-        bound_field = self[name]
+        concurrency = self.async_render_concurrency
+        if concurrency <= 1 or self.fragment_caching or self.render_profile or get_active_profile():
+            return await sync_to_async(self.as_div)()
+
+        render_state = await sync_to_async(self.prepare_render_state)()
+        rows = render_state.render_plan.rows
+        chunk_size = -(-len(rows) // concurrency)
+        render_rows = sync_to_async(self.render_rows, thread_sensitive=False)
+        chunks = await asyncio.gather(*(
+            render_rows(rows[start:start + chunk_size], render_state)
+            for start in range(0, len(rows), chunk_size)
+        ))
+        return mark_safe('\n\n'.join(chunks))
+
+    def prepare_render_state(self):
+        # errors are found before rows are rendered concurrently as every row would otherwise clean the form
+        if self.is_bound and self._errors is None:
+            self.full_clean()
+        self.error_index
+        return RenderState(self)
+
+    def render_rows(self, rows, render_state):
+        return '\n\n'.join(self.render_row(row, render_state) for row in rows)
+
+    async def render_field_async(self, name, field=None, in_panel=False):
+        from asgiref.sync import sync_to_async
+
+        return await sync_to_async(self.render_field)(name, field or self.fields[name], in_panel=in_panel)
+
+    async def error_summary_async(self, error_summary_title=None):
+        from asgiref.sync import sync_to_async
+
+        return await sync_to_async(self.error_summary)(error_summary_title)
+
+    def render_field(self, name, field, in_panel=False, render_state=None):
+        self.field_render_counts[name] += 1
+        render_profile = self.render_profile or get_active_profile()
+        if render_profile is not None:
+            return render_profile.profile_field(self, name, field, lambda: self.render_field_html(
+                name, field, in_panel=in_panel, render_state=render_state,
+            ))
+        return self.render_field_html(name, field, in_panel=in_panel, render_state=render_state)
+
+    def render_field_html(self, name, field, in_panel=False, render_state=None):
+        render_state = render_state or RenderState(self)
+        bound_field = render_state.get_bound_field(name)
         if bound_field.is_hidden:
-            return bound_field
+            return bound_field.bound_field
 
-        widget = field.widget
-        if hasattr(widget, 'conditionally_revealed'):
-            widget.conditionally_revealed = {
-                value: {
-                    'bound_field': self[target_field],
-                    'html': self.conditionally_revealed[target_field]['html'],
-                }
-                for value, target_field in self.reveal_conditionally.get(name, {}).items()
-            }
-        errors = [conditional_escape(error) for error in bound_field.errors]
-        group_classes = self.field_group_panel_classes if in_panel else self.field_group_classes
-        if hasattr(widget, 'field_group_classes'):
-            group_classes = '%s %s' % (group_classes, widget.field_group_classes)
-        group_classes = bound_field.css_classes(group_classes)
-        label_classes = self.field_label_classes
-        help_classes = self.field_help_classes
+        field_plan = render_state.render_plan.fields[name]
+        errors = [conditional_escape(error) for error in bound_field.field_errors or ()]
+        group_classes = bound_field.css_classes(
+            field_plan.panel_group_classes if in_panel else field_plan.group_classes
+        )
         if bound_field.label:
             label = conditional_escape(force_text(bound_field.label))
         else:
             label = ''
-        if getattr(widget, 'inherit_label_from_field', False):
-            widget.label = label
         if field.help_text:
             help_text = force_text(field.help_text)
         else:
             help_text = ''
 
-        if errors:
-            widget_classes = getattr(widget, 'input_error_classes', 'form-control-error')
-        else:
-            widget_classes = ''
         widget_attrs = {
-            'class': widget_classes,
+            'class': field_plan.input_error_classes if errors else '',
         }
-        rendered_field = bound_field.as_widget(attrs=widget_attrs)
+        if field_plan.accepts_render_context:
+            render_context = {
+                'conditionally_revealed': {
+                    value: render_state.get_revealed_panel(target_fields, name, index)
+                    for index, (value, target_fields) in enumerate(field_plan.reveals_conditionally)
+                },
+            }
+            if field_plan.inherit_label_from_field:
+                render_context['label'] = label
+            widget_attrs[govuk_widgets.render_context_attr] = render_context
+        if self.client_validation:
+            part_attrs = validation.get_part_validation_attrs(self, name, field)
+            if part_attrs is None:
+                widget_attrs.update(validation.get_validation_attrs(self, name, field))
+            else:
+                widget_attrs[govuk_widgets.render_context_attr] = {'subwidget_attrs': part_attrs}
+        rendered_field = bound_field.bound_field.as_widget(attrs=widget_attrs)
         if field.show_hidden_initial:
-            rendered_field += bound_field.as_hidden(only_initial=True)
+            rendered_field += bound_field.bound_field.as_hidden(only_initial=True)
 
         field_context = {
             'bound_field': bound_field,
             'rendered_field': rendered_field,
             'errors': errors,
-            'group_classes': group_classes.strip(),
-            'label_classes': label_classes.strip(),
-            'help_classes': help_classes.strip(),
+            'group_classes': group_classes,
+            'label_classes': field_plan.label_classes,
+            'help_classes': field_plan.help_classes,
             'label': label,
             'help_text': help_text,
         }
-        group_template_name = self.get_group_template_name(widget)
-        return mark_safe(self.renderer.render(group_template_name, field_context))
+        return mark_safe(self.renderer.render(field_plan.group_template_name, field_context))
 
     def error_summary(self, error_summary_title=None):
-        errors = self.errors
-        if not errors:
+        error_index = self.error_index
+        if not self.errors:
             return ''
 
-        non_field_errors = self.non_field_errors()
-        field_errors = OrderedDict(
-            (field, errors[field.name])
-            for field in self
-            if field.name in self.errors
-        )
+        error_summary_id = self.claim_error_summary_id()
         context = {
             'error_summary_title': error_summary_title or self.error_summary_title,
-            'random_string': get_random_string(4),
-            'errors': errors,  # does not preserve field order
-            'non_field_errors': non_field_errors,
-            'field_errors': field_errors,
+            'error_summary_id': error_summary_id,
+            # used by overridden templates of earlier versions
+            'random_string': error_summary_id[len('error-summary-heading-'):],
+            'errors': self.errors,  # does not preserve field order
+            'non_field_errors': self.non_field_errors(),
+            'field_errors': OrderedDict(
+                (self[name], field_errors)
+                for name, field_errors in error_index.items()
+            ),
         }
         return mark_safe(self.renderer.render(self.error_summary_template_name, context))
 
+    def get_error_summary_id(self, number=1):
+        """
+        Id of the error summary heading which is the same for every render of an equivalent page,
+        so that identical pages are byte-identical; `number` counts summaries on the page with the same form prefix
+        """
+        error_summary_id = 'error-summary-heading-%s' % (self.prefix or 'form')
+        if number > 1:
+            error_summary_id = '%s-%d' % (error_summary_id, number)
+        return error_summary_id
+
+    def claim_error_summary_id(self):
+        used_ids = getattr(page_state, 'error_summary_ids', None)
+        if used_ids is None:
+            # outside of requests, ids are only unique among summaries of this form
+            self.error_summary_count += 1
+            return self.get_error_summary_id(self.error_summary_count)
+        number = 1
+        while self.get_error_summary_id(number) in used_ids:
+            number += 1
+        error_summary_id = self.get_error_summary_id(number)
+        used_ids.add(error_summary_id)
+        return error_summary_id
+
+    @cached_property
+    def error_index(self):
+        """
+        Errors of fields in field order, including those in fieldsets and conditionally revealed fields;
+        built once per cleaning of the form rather than looking up errors of every field
+        """
+        errors = self.errors
+        return OrderedDict(
+            (name, errors[name])
+            for name in self.fields
+            if name in errors
+        )
+
+    def full_clean(self):
+        self.__dict__.pop('error_index', None)
+        # fields revealed by an instance's own `reveal_conditionally` are made optional before they are cleaned
+        self.get_reveal_index()
+        super().full_clean()
+
+    def add_error(self, field, error):
+        self.__dict__.pop('error_index', None)
+        super().add_error(field, error)
+
+    def get_validation_schema(self):
+        """
+        Returns validation rules of fields for client-side scripts, see `govuk_forms.validation`
+        """
+        return validation.get_validation_schema(self)
+
+    def validation_schema_script(self):
+        """
+        Outputs the validation schema as a JSON script element for client-side scripts to read
+        """
+        return format_html(
+            '<script type="application/json" id="{}-validation-schema">{}</script>',
+            self.prefix or 'form', mark_safe(validation.dump_schema(self.get_validation_schema())),
+        )
+
     def submit_button(self, label=None):
         context = {'label': label or self.submit_button_label}
         return mark_safe(self.renderer.render(self.submit_button_template_name, context))
+
+    def get_cached_fragment(self, fragment_name, render, *args):
+        if not self.fragment_caching or self.is_bound or self.render_profile or get_active_profile() \
+                or not caching.fragment_caching_enabled():
+            return render()
+        key = caching.get_fragment_key(self, fragment_name, *args)
+        if key is None:
+            return render()
+        cache = caching.get_fragment_cache()
+        html = cache.get(key)
+        if html is None:
+            html = render()
+            cache.set(key, str(html), self.fragment_cache_timeout)
+        return mark_safe(html)
+
+    @classmethod
+    def invalidate_fragment_cache(cls):
+        """
+        Invalidates cached output of this form class and its subclasses,
+        e.g. when choices loaded from the database change
+        """
+        caching.invalidate_fragments(cls)
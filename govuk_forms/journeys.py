@@ -0,0 +1,455 @@
+import datetime
+import decimal
+import hashlib
+import json
+import uuid
+
+from django import forms
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.forms.utils import pretty_name
+from django.http import Http404
+from django.shortcuts import redirect
+from django.urls import reverse
+from django.utils import formats
+from django.utils.dateparse import parse_datetime, parse_duration, parse_time
+from django.utils.duration import duration_string
+from django.utils.encoding import force_text
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext, gettext_lazy as _
+from django.views.generic import TemplateView
+
+from govuk_forms.fields import SplitDateField
+from govuk_forms.renderers import get_form_renderer
+
+
+class FieldCodec:
+    """
+    Stores cleaned values of a field in a compact, JSON-serialisable form for sessions
+    and describes them for summaries
+    """
+    storable_types = (str, int, float, bool, type(None))
+
+    def __init__(self, field):
+        self.field = field
+
+    def encode(self, value):
+        if isinstance(value, (list, tuple)):
+            return [self.encode(item) for item in value]
+        if not isinstance(value, self.storable_types):
+            raise TypeError('Cannot store %r in a journey, register a field codec for %s' % (
+                value, type(self.field).__name__
+            ))
+        return value
+
+    def decode(self, value):
+        return value
+
+    def display(self, value):
+        if value in self.field.empty_values:
+            return ''
+        return formats.localize(value)
+
+
+class BooleanCodec(FieldCodec):
+    def display(self, value):
+        if value is None:
+            return ''
+        return gettext('Yes') if value else gettext('No')
+
+
+class DateCodec(FieldCodec):
+    # dates are stored as proleptic Gregorian ordinals
+    def encode(self, value):
+        return None if value is None else value.toordinal()
+
+    def decode(self, value):
+        return None if value is None else datetime.date.fromordinal(value)
+
+
+class DateTimeCodec(FieldCodec):
+    def encode(self, value):
+        return None if value is None else value.isoformat()
+
+    def decode(self, value):
+        return None if value is None else parse_datetime(value)
+
+
+class TimeCodec(DateTimeCodec):
+    def decode(self, value):
+        return None if value is None else parse_time(value)
+
+
+class DecimalCodec(FieldCodec):
+    def encode(self, value):
+        return None if value is None else str(value)
+
+    def decode(self, value):
+        return None if value is None else decimal.Decimal(value)
+
+
+class DurationCodec(FieldCodec):
+    def encode(self, value):
+        return None if value is None else duration_string(value)
+
+    def decode(self, value):
+        return None if value is None else parse_duration(value)
+
+
+class UUIDCodec(FieldCodec):
+    def encode(self, value):
+        return None if value is None else str(value)
+
+    def decode(self, value):
+        try:
+            return None if value is None else uuid.UUID(value)
+        except (TypeError, ValueError):
+            return None
+
+
+class UnsupportedCodec(FieldCodec):
+    # e.g. uploaded files, which cannot be kept in sessions; journeys with such fields fail when they are defined
+    def __init__(self, field):
+        raise ImproperlyConfigured('%s cannot be stored in a journey, register a field codec for it' % (
+            type(field).__name__
+        ))
+
+
+class ChoiceCodec(FieldCodec):
+    # choices are stored as their values rather than positions so that answers survive reordered choices;
+    # values not found in the field's flattened choices (e.g. if choices are changed on form instances)
+    # are still returned, but positions stored by earlier versions are treated as missing
+    def __init__(self, field):
+        super().__init__(field)
+        self.labels = {}
+        for value, label in field.choices:
+            if isinstance(label, (list, tuple)):
+                self.labels.update((force_text(value), label) for value, label in label)
+            else:
+                self.labels[force_text(value)] = label
+
+    def encode(self, value):
+        if value in self.field.empty_values:
+            return None
+        return force_text(value)
+
+    def decode(self, value):
+        if not isinstance(value, str):
+            return None
+        return value
+
+    def display(self, value):
+        if value in self.field.empty_values:
+            return ''
+        return self.labels.get(force_text(value), value)
+
+
+class MultipleChoiceCodec(ChoiceCodec):
+    def encode(self, value):
+        return [super(MultipleChoiceCodec, self).encode(item) for item in value or ()]
+
+    def decode(self, value):
+        return [
+            item
+            for item in (super(MultipleChoiceCodec, self).decode(item) for item in value or ())
+            if item is not None
+        ]
+
+    def display(self, value):
+        return ', '.join(force_text(super(MultipleChoiceCodec, self).display(item)) for item in value or ())
+
+
+class ModelChoiceCodec(FieldCodec):
+    # model instances are stored as their primary key (or `to_field_name`) and looked up again,
+    # those no longer in the field's queryset are treated as missing
+    def encode(self, value):
+        if value in self.field.empty_values:
+            return None
+        return force_text(self.field.prepare_value(value))
+
+    def decode(self, value):
+        if value is None:
+            return None
+        try:
+            return self.field.to_python(value)
+        except ValidationError:
+            return None
+
+    def display(self, value):
+        if value in self.field.empty_values:
+            return ''
+        return self.field.label_from_instance(value)
+
+
+class ModelMultipleChoiceCodec(ModelChoiceCodec):
+    def encode(self, value):
+        return [super(ModelMultipleChoiceCodec, self).encode(item) for item in value or ()]
+
+    def decode(self, value):
+        try:
+            return list(self.field.to_python(value or []))
+        except ValidationError:
+            return []
+
+    def display(self, value):
+        return ', '.join(force_text(super(ModelMultipleChoiceCodec, self).display(item)) for item in value or ())
+
+
+# codecs are chosen for the first matching field class, see `register_field_codec`
+field_codecs = [
+    (forms.ModelMultipleChoiceField, ModelMultipleChoiceCodec),
+    (forms.ModelChoiceField, ModelChoiceCodec),
+    ((forms.TypedChoiceField, forms.TypedMultipleChoiceField), FieldCodec),
+    (forms.MultipleChoiceField, MultipleChoiceCodec),
+    (forms.ChoiceField, ChoiceCodec),
+    (forms.BooleanField, BooleanCodec),
+    ((forms.DateField, SplitDateField), DateCodec),
+    ((forms.DateTimeField, forms.SplitDateTimeField), DateTimeCodec),
+    (forms.TimeField, TimeCodec),
+    (forms.DecimalField, DecimalCodec),
+    (forms.DurationField, DurationCodec),
+    (forms.UUIDField, UUIDCodec),
+    (forms.FileField, UnsupportedCodec),
+]
+
+
+def register_field_codec(field_classes, codec):
+    """
+    Stores values of fields of these classes (and subclasses) in journeys using a `FieldCodec` subclass,
+    taking precedence over built-in codecs
+    """
+    field_codecs.insert(0, (field_classes, codec))
+
+
+def get_field_codec(field):
+    for field_classes, codec in field_codecs:
+        if isinstance(field, field_classes):
+            return codec(field)
+    return FieldCodec(field)
+
+
+class FormCodec:
+    """
+    Stores cleaned data of a form class as a list of values in field order
+    """
+
+    def __init__(self, form_class):
+        self.form_class = form_class
+        self.fields = [
+            (name, field, get_field_codec(field))
+            for name, field in form_class.base_fields.items()
+        ]
+
+    def encode(self, cleaned_data):
+        return [
+            codec.encode(cleaned_data.get(name))
+            for name, field, codec in self.fields
+        ]
+
+    def decode(self, values):
+        return {
+            name: codec.decode(value)
+            for (name, field, codec), value in zip(self.fields, values)
+        }
+
+    def summarise(self, values):
+        """
+        Lists (name, label, displayed value) of visible fields, omitting conditionally revealed fields
+        that were not revealed
+        """
+        hidden = set()
+        reveal_index = getattr(self.form_class, 'reveal_index', None)
+        if reveal_index:
+            hidden.update(reveal_index.required)
+            hidden.difference_update(reveal_index.iter_revealed(self.decode(values)))
+        return [
+            (name, field.label or pretty_name(name), codec.display(codec.decode(value)))
+            for (name, field, codec), value in zip(self.fields, values)
+            if not field.widget.is_hidden and name not in hidden
+        ]
+
+
+def get_form_codec(form_class):
+    # kept on the form class so that it is discarded with dynamically created classes
+    form_codec = form_class.__dict__.get('journey_codec')
+    if form_codec is None:
+        form_codec = FormCodec(form_class)
+        form_class.journey_codec = form_codec
+    return form_codec
+
+
+def digest_input(data, files=None):
+    """
+    Digest of submitted data used to skip validation of unchanged steps; uploaded files are never skipped
+    """
+    if files:
+        return None
+    data = sorted(
+        (key, data.getlist(key) if hasattr(data, 'getlist') else data[key])
+        for key in data
+        if key != 'csrfmiddlewaretoken'
+    )
+    return hashlib.sha1(json.dumps(data).encode()).hexdigest()[:16]
+
+
+class JourneyStorage:
+    """
+    Cleaned data of journey steps stored in the session as {step name: [input digest, values]}
+    """
+
+    def __init__(self, session, key, steps):
+        self.session = session
+        self.key = key
+        self.steps = steps
+
+    @property
+    def data(self):
+        return self.session.get(self.key) or {}
+
+    def is_complete(self, step_name):
+        return step_name in self.data
+
+    def is_unchanged(self, step_name, data, files=None):
+        digest = digest_input(data, files)
+        stored = self.data.get(step_name)
+        return digest is not None and stored is not None and stored[0] == digest
+
+    def save_step(self, step_name, form, data, files=None):
+        stored = self.data
+        stored[step_name] = [
+            digest_input(data, files),
+            get_form_codec(self.steps[step_name]).encode(form.cleaned_data),
+        ]
+        self.session[self.key] = stored
+        self.session.modified = True
+
+    def get_cleaned_data(self, step_name):
+        stored = self.data.get(step_name)
+        if stored is None:
+            return None
+        return get_form_codec(self.steps[step_name]).decode(stored[1])
+
+    def get_all_cleaned_data(self):
+        return {
+            step_name: self.get_cleaned_data(step_name)
+            for step_name in self.steps
+        }
+
+    def summarise(self):
+        data = self.data
+        return [
+            (step_name, get_form_codec(form_class).summarise(data[step_name][1]))
+            for step_name, form_class in self.steps.items()
+            if step_name in data
+        ]
+
+    def reset(self):
+        self.session.pop(self.key, None)
+        self.session.modified = True
+
+
+class JourneyView(TemplateView):
+    """
+    Multi-page form where each step is a GOV.UK form, followed by a check-your-answers page;
+    url patterns pass a `step` keyword argument, or none to start or resume the journey,
+    and subclasses implement `done`
+    """
+    steps = ()  # sequence of (step name, form class)
+    summary_step = 'check-your-answers'
+    summary_template_name = None
+    check_your_answers_template_name = 'govuk_forms/check-your-answers.html'
+    change_link_text = _('Change')
+    session_key = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # fields that cannot be stored are reported when url patterns are loaded rather than when steps are posted
+        for step_name, form_class in initkwargs.get('steps', cls.steps):
+            get_form_codec(form_class)
+        return super().as_view(**initkwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        self.step_forms = dict(self.steps)
+        self.step_name = kwargs.get('step')
+        self.storage = JourneyStorage(
+            request.session,
+            self.session_key or 'govuk_forms_journey_%s' % type(self).__name__,
+            self.step_forms,
+        )
+        if self.step_name is None:
+            return redirect(self.get_step_url(self.get_next_step()))
+        if self.step_name != self.summary_step and self.step_name not in self.step_forms:
+            raise Http404
+        first_incomplete_step = self.get_first_incomplete_step()
+        if first_incomplete_step and self.get_step_index(first_incomplete_step) < self.get_step_index(self.step_name):
+            return redirect(self.get_step_url(first_incomplete_step))
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_step_index(self, step_name):
+        if step_name == self.summary_step:
+            return len(self.steps)
+        return [name for name, form_class in self.steps].index(step_name)
+
+    def get_first_incomplete_step(self):
+        for step_name, form_class in self.steps:
+            if not self.storage.is_complete(step_name):
+                return step_name
+        return None
+
+    def get_step_url(self, step_name):
+        resolver_match = self.request.resolver_match
+        return reverse(resolver_match.view_name, args=resolver_match.args,
+                       kwargs=dict(resolver_match.kwargs, step=step_name))
+
+    def get_next_step(self):
+        # once every step is complete, changed answers return to the summary
+        return self.get_first_incomplete_step() or self.summary_step
+
+    def get_form(self, data=None, files=None):
+        form_class = self.step_forms[self.step_name]
+        if data is None:
+            return form_class(initial=self.storage.get_cleaned_data(self.step_name))
+        return form_class(data=data, files=files)
+
+    def get_template_names(self):
+        if self.step_name == self.summary_step and self.summary_template_name:
+            return [self.summary_template_name]
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['step'] = self.step_name
+        if self.step_name == self.summary_step:
+            context['check_your_answers'] = self.render_check_your_answers()
+        elif 'form' not in context:
+            context['form'] = self.get_form()
+        return context
+
+    def render_check_your_answers(self):
+        # summaries are built from stored values without instantiating forms
+        answers = [
+            (self.get_step_url(step_name), summary)
+            for step_name, summary in self.storage.summarise()
+        ]
+        return mark_safe(get_form_renderer().render(self.check_your_answers_template_name, {
+            'answers': answers,
+            'change_link_text': self.change_link_text,
+        }))
+
+    def post(self, request, *args, **kwargs):
+        if self.step_name == self.summary_step:
+            response = self.done(self.storage.get_all_cleaned_data())
+            self.storage.reset()
+            return response
+        if not self.storage.is_unchanged(self.step_name, request.POST, request.FILES):
+            form = self.get_form(data=request.POST, files=request.FILES)
+            if not form.is_valid():
+                return self.render_to_response(self.get_context_data(form=form))
+            self.storage.save_step(self.step_name, form, request.POST, request.FILES)
+        return redirect(self.get_step_url(self.get_next_step()))
+
+    def done(self, cleaned_data):
+        """
+        Called with cleaned data of every step, keyed by step name, once answers are checked;
+        returns a response
+        """
+        raise NotImplementedError
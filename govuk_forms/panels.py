@@ -0,0 +1,43 @@
+from debug_toolbar.panels import Panel
+from django.utils.translation import gettext_lazy as _
+
+from govuk_forms.profiling import RenderProfile
+
+
+class RenderProfilePanel(Panel):
+    """
+    django-debug-toolbar panel showing how long GOV.UK form fields took to render during a request;
+    add 'govuk_forms.panels.RenderProfilePanel' to DEBUG_TOOLBAR_PANELS
+    """
+    title = _('GOV.UK form rendering')
+    template = 'govuk_forms/profiling-panel.html'
+    profile = None
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        if not stats:
+            return ''
+        return _('%(field_count)d fields in %(total_ms).2fms') % stats
+
+    def enable_instrumentation(self):
+        self.profile = RenderProfile().__enter__()
+
+    def disable_instrumentation(self):
+        if self.profile is not None:
+            self.profile.__exit__(None, None, None)
+
+    def generate_stats(self, request, response):
+        if self.profile is None:
+            return
+        report = self.profile.report()
+        for field_report in report['fields']:
+            field_report['own_ms'] = field_report['own_duration'] * 1000
+            field_report['total_ms'] = field_report['duration'] * 1000
+        self.record_stats({
+            'field_count': report['field_count'],
+            'total_ms': report['total_duration'] * 1000,
+            'bytes': report['bytes'],
+            'fields': report['fields'],
+            'renderer_calls': sorted(report['renderer_calls'].items()),
+        })
@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict, namedtuple
+
+from django.forms.renderers import BaseRenderer
+
+logger = logging.getLogger('govuk_forms.profiling')
+
+# a field rendered by GOVUKForm.render_field; durations are in seconds and `own_duration` excludes
+# fields rendered within this one (e.g. conditionally revealed fields), as do `renderer_calls`
+FieldRender = namedtuple('FieldRender', (
+    'form_class', 'field_name', 'template_name', 'widget_class',
+    'duration', 'own_duration', 'bytes', 'renderer_calls', 'depth',
+))
+
+try:
+    # follows async code and `sync_to_async` threads, as django's translation state does
+    from asgiref.local import Local
+except ImportError:  # django < 3.0
+    Local = threading.local
+
+_active = Local()
+
+
+def get_active_profile():
+    return getattr(_active, 'profile', None)
+
+
+class ProfilingRenderer(BaseRenderer):
+    """
+    Wraps a form renderer while a form is profiled to count templates rendered through it;
+    it compares equal to the wrapped renderer so that caches keyed by renderer are still used
+    """
+
+    def __init__(self, renderer, profile):
+        self.renderer = renderer
+        self.profile = profile
+
+    def __eq__(self, other):
+        if isinstance(other, ProfilingRenderer):
+            other = other.renderer
+        return self.renderer == other
+
+    def __hash__(self):
+        return hash(self.renderer)
+
+    def __getattr__(self, name):
+        return getattr(self.renderer, name)
+
+    def get_template(self, template_name):
+        return self.renderer.get_template(template_name)
+
+    def render(self, template_name, context, request=None):
+        self.profile.count_renderer_call(template_name)
+        return self.renderer.render(template_name, context, request=request)
+
+
+class RenderProfile:
+    """
+    Records how long each field of GOVUKForms takes to render; activate it for a block of code
+    with `with RenderProfile() as profile:` or set it as the `render_profile` of a form
+    """
+
+    def __init__(self):
+        self.records = []
+        self.renderer_calls = Counter()
+        self.stack = []
+        self.previous_profiles = []
+
+    def __enter__(self):
+        self.previous_profiles.append(get_active_profile())
+        _active.profile = self
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _active.profile = self.previous_profiles.pop()
+
+    def count_renderer_call(self, template_name):
+        self.renderer_calls[template_name] += 1
+        if self.stack:
+            self.stack[-1]['renderer_calls'] += 1
+
+    def profile_field(self, form, name, field, render):
+        """
+        Calls `render` to render a field of a form recording its timing
+        """
+        is_outermost = not self.stack
+        if is_outermost:
+            renderer = form.renderer
+            form.renderer = ProfilingRenderer(renderer, self)
+        frame = {'child_duration': 0, 'renderer_calls': 0}
+        self.stack.append(frame)
+        start = time.perf_counter()
+        try:
+            html = render()
+        finally:
+            duration = time.perf_counter() - start
+            self.stack.pop()
+            if is_outermost:
+                form.renderer = renderer
+        if self.stack:
+            self.stack[-1]['child_duration'] += duration
+
+        field_plan = form.render_plan.fields.get(name)
+        self.records.append(FieldRender(
+            form_class='%s.%s' % (type(form).__module__, type(form).__qualname__),
+            field_name=name,
+            template_name=field_plan.group_template_name if field_plan and not field.widget.is_hidden else None,
+            widget_class='%s.%s' % (type(field.widget).__module__, type(field.widget).__qualname__),
+            duration=duration,
+            own_duration=duration - frame['child_duration'],
+            bytes=len(str(html).encode()),
+            renderer_calls=frame['renderer_calls'],
+            depth=len(self.stack),
+        ))
+        return html
+
+    @property
+    def total_duration(self):
+        return sum(record.duration for record in self.records if record.depth == 0)
+
+    def report(self, limit=None):
+        """
+        Aggregates recorded fields by form and field name, slowest first by time excluding nested fields
+        """
+        fields = OrderedDict()
+        for record in self.records:
+            key = (record.form_class, record.field_name)
+            if key not in fields:
+                fields[key] = {
+                    'form_class': record.form_class, 'field_name': record.field_name,
+                    'template_name': record.template_name, 'widget_class': record.widget_class,
+                    'count': 0, 'duration': 0, 'own_duration': 0, 'bytes': 0, 'renderer_calls': 0,
+                }
+            field_report = fields[key]
+            field_report['count'] += 1
+            for attribute in ('duration', 'own_duration', 'bytes', 'renderer_calls'):
+                field_report[attribute] += getattr(record, attribute)
+        field_reports = sorted(fields.values(), key=lambda field_report: field_report['own_duration'], reverse=True)
+        return {
+            'total_duration': self.total_duration,
+            'field_count': len(self.records),
+            'bytes': sum(record.bytes for record in self.records if record.depth == 0),
+            'renderer_calls': dict(self.renderer_calls),
+            'fields': field_reports[:limit] if limit else field_reports,
+        }
+
+    def log(self, limit=10, level=logging.INFO):
+        if not self.records or not logger.isEnabledFor(level):
+            return
+        report = self.report(limit=limit)
+        logger.log(level, 'Rendered %d form fields in %.2fms, %d bytes', report['field_count'],
+                   report['total_duration'] * 1000, report['bytes'])
+        for field_report in report['fields']:
+            logger.log(level, '  %.2fms (%.2fms total) × %d %s.%s %s %s, %d bytes, %d templates',
+                       field_report['own_duration'] * 1000, field_report['duration'] * 1000, field_report['count'],
+                       field_report['form_class'], field_report['field_name'],
+                       field_report['widget_class'], field_report['template_name'],
+                       field_report['bytes'], field_report['renderer_calls'])
+
+
+class RenderProfileMiddleware:
+    """
+    Profiles GOVUKForm fields rendered while handling each request,
+    logs a report to `govuk_forms.profiling` and keeps the profile as `request.govuk_forms_render_profile`
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with RenderProfile() as profile:
+            request.govuk_forms_render_profile = profile
+            response = self.get_response(request)
+        profile.log()
+        return response
@@ -0,0 +1,468 @@
+import functools
+import hashlib
+import os
+
+from django import forms
+from django.conf import settings
+from django.forms.renderers import BaseRenderer, get_default_renderer
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import SafeData, mark_safe
+from django.utils.timezone import template_localtime
+from django.utils.translation import gettext
+
+
+def render_value(value):
+    # like `{{ value }}` in an autoescaping django template
+    value = localize(template_localtime(value))
+    if not issubclass(type(value), str):
+        value = str(value)
+    return conditional_escape(value)
+
+
+def render_string_value(value):
+    # like `{{ value|stringformat:'s' }}` in an autoescaping django template
+    if isinstance(value, tuple):
+        value = str(value)
+    string_value = '%s' % value
+    if isinstance(value, SafeData):
+        return string_value
+    return conditional_escape(string_value)
+
+
+def lookup(obj, name):
+    # like `{{ obj.name }}` variable resolution in a django template, but without string_if_invalid
+    try:
+        value = obj[name]
+    except (TypeError, KeyError, AttributeError):
+        value = getattr(obj, name, '')
+    if callable(value) and not getattr(value, 'do_not_call_in_templates', False):
+        value = value()
+    return value
+
+
+def build_attrs_include(renderer, context):
+    return build_attrs(context['widget']['attrs'])
+
+
+def build_attrs(attrs):
+    return ''.join(
+        ' %s%s' % (render_value(name), '' if value is True else '="%s"' % render_string_value(value))
+        for name, value in attrs.items()
+        if value is not False
+    )
+
+
+def build_input(renderer, context):
+    widget = context['widget']
+    value = widget['value']
+    return '<input type="%s" name="%s"%s%s>\n' % (
+        render_value(widget['type']),
+        render_value(widget['name']),
+        '' if value is None else ' value="%s"' % render_string_value(value),
+        build_attrs(widget['attrs']),
+    )
+
+
+def build_input_include(renderer, context):
+    return build_input(renderer, context) + '\n'
+
+
+def build_field(renderer, context):
+    auto_id = render_value(context['bound_field'].auto_id)
+    help_text = context['help_text']
+    return (
+        '<div id="%(auto_id)s-group" class="%(group_classes)s">\n'
+        '  <label id="%(auto_id)s-label" class="%(label_classes)s" for="%(auto_id)s">\n'
+        '    %(label)s\n'
+        '    %(help)s\n'
+        '  </label>\n'
+        '\n'
+        '  %(errors)s\n'
+        '\n'
+        '  %(rendered_field)s\n'
+        '</div>\n'
+    ) % {
+        'auto_id': auto_id,
+        'group_classes': render_value(context['group_classes']),
+        'label_classes': render_value(context['label_classes']),
+        'label': render_value(context['label']),
+        'help': '\n      <span class="%s">%s</span>\n    ' % (
+            render_value(context['help_classes']), render_value(help_text),
+        ) if help_text else '',
+        'errors': ''.join(
+            '\n    <span class="error-message">%s</span>\n  ' % render_value(error)
+            for error in context['errors']
+        ),
+        'rendered_field': render_value(context['rendered_field']),
+    }
+
+
+def build_field_fieldset(renderer, context):
+    auto_id = render_value(context['bound_field'].auto_id)
+    help_text = context['help_text']
+    return (
+        '<div id="%(auto_id)s-group" class="%(group_classes)s">\n'
+        '  <fieldset>\n'
+        '    <legend id="%(auto_id)s-label" class="%(label_classes)s">%(label)s</legend>\n'
+        '    %(help)s\n'
+        '\n'
+        '    %(errors)s\n'
+        '\n'
+        '    %(rendered_field)s\n'
+        '  </fieldset>\n'
+        '</div>\n'
+    ) % {
+        'auto_id': auto_id,
+        'group_classes': render_value(context['group_classes']),
+        'label_classes': render_value(context['label_classes']),
+        'label': render_value(context['label']),
+        'help': '\n      <span class="%s">%s</span>\n    ' % (
+            render_value(context['help_classes']), render_value(help_text),
+        ) if help_text else '',
+        'errors': ''.join(
+            '\n      <span class="error-message">%s</span>\n    ' % render_value(error)
+            for error in context['errors']
+        ),
+        'rendered_field': render_value(context['rendered_field']),
+    }
+
+
+def build_field_no_label(renderer, context):
+    auto_id = render_value(context['bound_field'].auto_id)
+    help_text = context['help_text']
+    return (
+        '<div id="%(auto_id)s-group" class="%(group_classes)s">\n'
+        '  %(help)s\n'
+        '\n'
+        '  %(errors)s\n'
+        '\n'
+        '  %(rendered_field)s\n'
+        '</div>\n'
+    ) % {
+        'auto_id': auto_id,
+        'group_classes': render_value(context['group_classes']),
+        'help': '\n    <span class="%s">%s</span>\n  ' % (
+            render_value(context['help_classes']), render_value(help_text),
+        ) if help_text else '',
+        'errors': ''.join(
+            '\n    <span class="error-message">%s</span>\n  ' % render_value(error)
+            for error in context['errors']
+        ),
+        'rendered_field': render_value(context['rendered_field']),
+    }
+
+
+def build_fieldset(renderer, context):
+    return '<fieldset>\n  <legend class="heading-medium">%s</legend>\n  %s\n</fieldset>\n' % (
+        render_value(context['legend']),
+        render_value(context['contents']),
+    )
+
+
+def build_revealed_group(renderer, context):
+    return '<div id="%s-group" class="%s">\n  %s\n</div>\n' % (
+        render_value(context['auto_id']),
+        render_value(context['group_classes']),
+        render_value(context['contents']),
+    )
+
+
+def build_submit_button(renderer, context):
+    return '<input type="submit" class="button" value="%s"/>\n' % render_value(context['label'])
+
+
+def build_conditionally_revealed(conditionally_revealed):
+    if not conditionally_revealed:
+        return '', ''
+    target = 'data-target="%s-group"' % render_value(lookup(lookup(conditionally_revealed, 'bound_field'), 'auto_id'))
+    html = '\n  %s\n' % render_value(lookup(conditionally_revealed, 'html'))
+    return target, html
+
+
+def build_checkbox(renderer, context):
+    widget = context['widget']
+    widget_id = render_value(widget['attrs'].get('id', ''))
+    target, html = build_conditionally_revealed(context.get('conditionally_revealed'))
+    return (
+        '<div class="multiple-choice" %s>\n'
+        '  %s\n'
+        '  <label id="%s-label" for="%s">%s</label>\n'
+        '</div>\n'
+        '%s\n'
+    ) % (target, build_input(renderer, context), widget_id, widget_id, render_value(widget.get('label', '')), html)
+
+
+def build_multiple_select_option(renderer, context):
+    widget = context['widget']
+    widget_id = render_value(widget['attrs'].get('id', ''))
+    target, html = build_conditionally_revealed(widget.get('conditionally_revealed'))
+    return (
+        '<div id="%s-group" class="multiple-choice" %s>\n'
+        '  %s\n'
+        '  <label id="%s-label" for="%s">%s</label>\n'
+        '</div>\n'
+        '%s\n'
+    ) % (widget_id, target, build_input(renderer, context), widget_id, widget_id, render_value(widget['label']), html)
+
+
+def has_option_builder(renderer, option):
+    return 'html' in option or renderer.get_builder(option['template_name']) is not None
+
+
+def build_option(renderer, option):
+    # options may have been rendered already by widgets caching them
+    if 'html' in option:
+        return option['html']
+    return renderer.get_builder(option['template_name'])(renderer, {'widget': option})
+
+
+def build_multiple_select(renderer, context):
+    widget = context['widget']
+    optgroups = widget['optgroups']
+    if not all(has_option_builder(renderer, option) for group, options, index in optgroups for option in options):
+        return None
+    widget_id = render_value(widget['attrs'].get('id', ''))
+    separate_last_option = context['separate_last_option']
+    is_flat_list = context['is_flat_list']
+    last_option_label = render_value(context['last_option_label'] or gettext('or'))
+    html = []
+    for group, options, index in optgroups:
+        html.append('\n    ')
+        if group:
+            html.append(
+                '\n      <fieldset id="%(id)s-%(index)s-group">'
+                '\n        <legend id="%(id)s-%(index)s-label">%(group)s</legend>\n    ' % {
+                    'id': widget_id, 'index': render_value(index), 'group': render_value(group),
+                }
+            )
+        html.append('\n\n    ')
+        last_option_index = len(options) - 1
+        for option_index, option in enumerate(options):
+            html.append('\n      ')
+            if separate_last_option:
+                html.append('\n        ')
+                if (is_flat_list and len(optgroups) > 1 and index == len(optgroups) - 1) or \
+                        (len(options) > 1 and option_index == last_option_index):
+                    html.append('\n          <p class="form-block">%s</p>\n        ' % last_option_label)
+                html.append('\n      ')
+            html.append('\n\n      ')
+            html.append(build_option(renderer, option))
+            html.append('\n    ')
+        html.append('\n\n    ')
+        if group:
+            html.append('\n      </fieldset>\n    ')
+        html.append('\n  ')
+    return '\n  %s\n\n' % ''.join(html)
+
+
+def build_split_date(renderer, context):
+    html = []
+    for subwidget in context['widget']['subwidgets']:
+        rendered_subwidget = renderer.render_include(subwidget['template_name'], {'widget': subwidget})
+        if rendered_subwidget is None:
+            return None
+        subwidget_id = render_value(subwidget['attrs'].get('id', ''))
+        html.append(
+            '\n    <div class="%s">\n'
+            '      <label id="%s-label" class="%s" for="%s">%s</label>\n'
+            '      %s\n'
+            '    </div>\n  ' % (
+                render_value(subwidget['group_classes']),
+                subwidget_id, render_value(subwidget['label_classes']), subwidget_id,
+                render_value(subwidget['label']),
+                rendered_subwidget,
+            )
+        )
+    return '<div class="form-date">\n  %s\n</div>\n' % ''.join(html)
+
+
+def build_select(renderer, context):
+    widget = context['widget']
+    html = []
+    for group_name, options, index in widget['optgroups']:
+        if group_name:
+            html.append('\n  <optgroup label="%s">' % render_value(group_name))
+        for option in options:
+            if 'html' not in option:
+                return None
+            html.append('\n  %s' % option['html'])
+        if group_name:
+            html.append('\n  </optgroup>')
+    return '<select name="%s"%s>%s\n</select>\n' % (
+        render_value(widget['name']), build_attrs(widget['attrs']), ''.join(html),
+    )
+
+
+def build_date_select(renderer, context):
+    widget = context['widget']
+    return '<select name="%s"%s>%s\n</select>\n' % (
+        render_value(widget['name']), build_attrs(widget['attrs']), render_value(widget['options']),
+    )
+
+
+def build_error_summary(renderer, context):
+    non_field_errors = context['non_field_errors']
+    field_errors = context['field_errors']
+    if not (non_field_errors or field_errors):
+        return '\n'
+    error_summary_id = render_value(context['error_summary_id'])
+    html = [
+        '\n  <div class="error-summary" aria-labelledby="%s" role="alert" tabindex="-1">'
+        '\n    <h2 class="heading-medium error-summary-heading" id="%s">'
+        '\n      %s'
+        '\n    </h2>'
+        '\n    <ul class="error-summary-list">'
+        '\n      ' % (error_summary_id, error_summary_id, render_value(context['error_summary_title']))
+    ]
+    html.extend(
+        '\n        <li class="non-field-error">%s</li>\n      ' % render_value(error)
+        for error in non_field_errors
+    )
+    html.append('\n\n      ')
+    for field, errors in field_errors.items():
+        html.append(
+            '\n        <li class="field-error %s">'
+            '\n          <a %s>%s</a>'
+            '\n          <ul>'
+            '\n            %s'
+            '\n          </ul>'
+            '\n        </li>'
+            '\n      ' % (
+                'hidden-field-error' if field.is_hidden else '',
+                '' if field.is_hidden else 'href="#%s-label"' % render_value(field.auto_id),
+                render_value(field.label),
+                ''.join('\n              <li>%s</li>\n            ' % render_value(error) for error in errors),
+            )
+        )
+    html.append('\n    </ul>\n  </div>\n')
+    return '%s\n' % ''.join(html)
+
+
+# builders are keyed by template name and reproduce the template source with a given sha1;
+# they can only be used if the templates they include are also unchanged
+input_include = 'django/forms/widgets/input.html'
+builders = {
+    'django/forms/widgets/attrs.html': ('943fbb4cb2a40be55abd3c7641a930e0682a8484', build_attrs_include, ()),
+    'django/forms/widgets/input.html': ('bf4347b2113e74d522ae5efb78bf1b21b6f756c5', build_input, (
+        'django/forms/widgets/attrs.html',
+    )),
+    'govuk_forms/field.html': ('4e9b38e3c8213897ebce54ec23ac3d5f145de6db', build_field, ()),
+    'govuk_forms/field-fieldset.html': ('4f6d1d2f4495f0dbd47d1bfeeaf2a971c6bd7e00', build_field_fieldset, ()),
+    'govuk_forms/field-no-label.html': ('3e4c9a563e353afce7605e216392841dc0a81e10', build_field_no_label, ()),
+    'govuk_forms/fieldset.html': ('aa2d11c2c176dcad723d1e936cc19c1a005c8d2f', build_fieldset, ()),
+    'govuk_forms/revealed-group.html': ('c562fbacf4c0e21ad5b6d4a2ec6f0e6db990ced4', build_revealed_group, ()),
+    'govuk_forms/submit-button.html': ('84c6aac2614644c3a9844c676aca7b42f589bf55', build_submit_button, ()),
+    'govuk_forms/error-summary.html': ('8ca5dfc91ac90caa68db39a0e64b49c7d49c014e', build_error_summary, ()),
+    'govuk_forms/widgets/checkbox.html': ('699bbcfbd454a0799cc2d22464914c07403f6f96', build_checkbox, (
+        input_include,
+    )),
+    'govuk_forms/widgets/multiple-select.html': ('6a7394ad316d19136d9c2edd168f58ec0122b820',
+                                                 build_multiple_select, ()),
+    'govuk_forms/widgets/multiple-select-option.html': ('421fe5b331b194febe7987e6172099ead727ddcc',
+                                                        build_multiple_select_option, (input_include,)),
+    'govuk_forms/widgets/select.html': ('28fe450a2637fe94de56078a00f2e4589c29911e', build_select, (
+        'django/forms/widgets/attrs.html',
+    )),
+    'govuk_forms/widgets/date-select.html': ('24cd27b02718cd618604f000c3497af0f1ca042c', build_date_select, (
+        'django/forms/widgets/attrs.html',
+    )),
+    'govuk_forms/widgets/split-date.html': ('3bce0abee94882354ca8474e874053e67b2c0317', build_split_date, ()),
+}
+builders.update(
+    ('django/forms/widgets/%s.html' % input_type, ('efb3c0fa21853a0d696914620edbcc718a86a4ab', build_input_include, (
+        input_include,
+    )))
+    for input_type in ('checkbox', 'date', 'datetime', 'email', 'hidden', 'number', 'password', 'text', 'time', 'url')
+)
+# templates that only refer to `widget` so can be rendered outside of the including template
+isolated_templates = {
+    'django/forms/widgets/select.html': '7732e103a11c7c327653d23e4822fddf2f904d87',
+}
+
+
+class CompiledRenderer(BaseRenderer):
+    """
+    Wraps a form renderer to output built-in templates using python string building
+    unless a project overrides them, in which case the wrapped renderer is used
+    """
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.resolved_builders = {}
+
+    def get_template(self, template_name):
+        return self.renderer.get_template(template_name)
+
+    def get_template_source(self, template_name):
+        template = self.renderer.get_template(template_name)
+        return getattr(getattr(template, 'template', None), 'source', None)
+
+    def is_unchanged(self, template_name, source_hash):
+        source = self.get_template_source(template_name)
+        return source is not None and hashlib.sha1(source.encode()).hexdigest() == source_hash
+
+    def get_builder(self, template_name):
+        try:
+            return self.resolved_builders[template_name]
+        except KeyError:
+            pass
+        builder = None
+        if template_name in builders:
+            source_hash, template_builder, included_template_names = builders[template_name]
+            if self.is_unchanged(template_name, source_hash) and all(
+                self.get_builder(included_template_name) is not None
+                for included_template_name in included_template_names
+            ):
+                builder = template_builder
+        self.resolved_builders[template_name] = builder
+        return builder
+
+    def render_include(self, template_name, context):
+        builder = self.get_builder(template_name)
+        if builder is not None:
+            return builder(self, context)
+        if template_name in isolated_templates and self.is_unchanged(template_name, isolated_templates[template_name]):
+            return self.renderer.get_template(template_name).render(context)
+        return None
+
+    def render(self, template_name, context, request=None):
+        builder = self.get_builder(template_name)
+        if builder is not None:
+            html = builder(self, context)
+            if html is not None:
+                # django's renderers strip output of top-level templates, but not included ones
+                return mark_safe(html.strip())
+        return self.renderer.render(template_name, context, request=request)
+
+
+# directories of templates provided by django's forms and by this app
+builtin_template_paths = (os.path.dirname(forms.__file__), os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=64)
+def is_overridden(renderer, template_name):
+    """
+    Whether a renderer loads a project's own version of one of django's or GOV.UK forms' templates
+    """
+    origin = getattr(renderer.get_template(template_name), 'origin', None)
+    name = getattr(origin, 'name', None)
+    return name is not None and not name.startswith(builtin_template_paths)
+
+
+@functools.lru_cache()
+def get_form_renderer():
+    """
+    Renderer of GOV.UK forms which are not given one: the class named by the GOVUK_FORMS_RENDERER setting,
+    e.g. `django.forms.renderers.Jinja2` to use the Jinja2 templates, or django's default form renderer
+    """
+    renderer_class = getattr(settings, 'GOVUK_FORMS_RENDERER', None)
+    if not renderer_class:
+        return get_default_renderer()
+    return import_string(renderer_class)()
+
+
+@functools.lru_cache(maxsize=16)
+def get_compiled_renderer(renderer):
+    return CompiledRenderer(renderer)
@@ -0,0 +1,17 @@
+from django import template
+
+register = template.Library()
+
+stream_context_key = 'govuk_forms_stream'
+
+
+@register.simple_tag(takes_context=True)
+def stream_form(context, form):
+    """
+    Outputs the fields of a GOV.UK form; in a template rendered by `govuk_forms.views.stream_template_response`,
+    the fields are streamed to the client as they are rendered instead
+    """
+    stream = context.get(stream_context_key)
+    if stream is None:
+        return form.as_div()
+    return stream.add_form(form)
@@ -0,0 +1,161 @@
+"""
+Describes validation rules of GOV.UK forms for scripts that check fields before forms are submitted;
+the server always validates again.
+Messages are output as the server would produce them, except that `%(value)s` in `invalid_choice`
+is left for scripts to replace
+"""
+import json
+
+from django import forms
+from django.utils.encoding import force_text
+
+from govuk_forms.fields import SplitDateField, YearField
+
+# field types as understood by client-side scripts, the first matching class is used
+field_types = (
+    (SplitDateField, 'split_date'),
+    (YearField, 'year'),
+    (forms.EmailField, 'email'),
+    (forms.URLField, 'url'),
+    (forms.IntegerField, 'integer'),
+    ((forms.DecimalField, forms.FloatField), 'number'),
+    ((forms.DateField, forms.DateTimeField, forms.TimeField, forms.SplitDateTimeField), 'date'),
+    (forms.MultipleChoiceField, 'multiple_choice'),
+    (forms.ChoiceField, 'choice'),
+    (forms.NullBooleanField, 'null_boolean'),
+    (forms.BooleanField, 'boolean'),
+    (forms.FileField, 'file'),
+)
+# error messages exported for each field if they apply
+message_codes = ('required', 'invalid', 'invalid_choice', 'min_value', 'max_value')
+# parts of a split date are required together with the whole field
+part_message_codes = ('invalid', 'min_value', 'max_value')
+# json output embedded in html
+json_escapes = {ord('>'): '\\u003E', ord('<'): '\\u003C', ord('&'): '\\u0026'}
+
+
+def get_field_type(field):
+    for field_classes, field_type in field_types:
+        if isinstance(field, field_classes):
+            return field_type
+    return 'text'
+
+
+def get_limits(field):
+    limits = {}
+    for attribute, key in (('min_value', 'min'), ('max_value', 'max'),
+                           ('min_length', 'min_length'), ('max_length', 'max_length')):
+        value = getattr(field, attribute, None)
+        if value is not None:
+            limits[key] = value if isinstance(value, (int, float)) else force_text(value)
+    return limits
+
+
+def get_messages(field, codes=message_codes):
+    messages = {}
+    for code in codes:
+        if code not in field.error_messages:
+            continue
+        message = field.error_messages[code]
+        if code in ('min_value', 'max_value'):
+            limit = getattr(field, code, None)
+            if limit is None:
+                continue
+            try:
+                message = message % {'limit_value': limit}
+            except (KeyError, TypeError):
+                continue
+        messages[code] = force_text(message)
+    return messages
+
+
+def get_field_rules(form, name, field, reveal_index):
+    bound_field = form[name]
+    rules = {
+        'name': bound_field.html_name,
+        'id': bound_field.auto_id,
+        'type': get_field_type(field),
+        'required': reveal_index.required.get(name, field.required),
+        'conditional': name in reveal_index.required,
+        'messages': get_messages(field),
+    }
+    rules.update(get_limits(field))
+    if isinstance(field, SplitDateField):
+        rules['parts'] = [
+            dict(get_limits(part), name='%s_%d' % (bound_field.html_name, index),
+                 messages=get_messages(part, codes=part_message_codes))
+            for index, part in enumerate(field.fields)
+        ]
+        rules['era_boundary'] = field.fields[2].era_boundary
+        rules['century'] = field.fields[2].century
+    elif isinstance(field, YearField):
+        rules['era_boundary'] = field.era_boundary
+        rules['century'] = field.century
+    elif isinstance(field, forms.ChoiceField) and not isinstance(field, forms.ModelChoiceField):
+        # model choices would need to be queried
+        rules['choices'] = [
+            force_text(value)
+            for value, label in flatten_choices(field.choices)
+            if value not in field.empty_values
+        ]
+    return rules
+
+
+def flatten_choices(choices):
+    for value, label in choices:
+        if isinstance(label, (list, tuple)):
+            yield from label
+        else:
+            yield value, label
+
+
+def get_validation_schema(form):
+    """
+    Returns JSON-serialisable validation rules of a form's visible fields and its conditionally revealed fields
+    """
+    reveal_index = form.get_reveal_index()
+    return {
+        'prefix': form.prefix,
+        'fields': [
+            get_field_rules(form, name, field, reveal_index)
+            for name, field in form.fields.items()
+            if not field.widget.is_hidden and not field.disabled
+        ],
+        'reveal_conditionally': {
+            form[trigger_name].html_name: {
+                force_text(value): [form[target_name].html_name for target_name in target_names]
+                for value, target_names in targets_by_value.items()
+            }
+            for trigger_name, targets_by_value in reveal_index.triggers.items()
+        },
+    }
+
+
+def get_validation_attrs(form, name, field, codes=message_codes):
+    """
+    Returns html attributes of a field's widget which describe validation that browsers do not perform
+    """
+    reveal_index = form.get_reveal_index()
+    attrs = {'data-validation-type': get_field_type(field)}
+    if reveal_index.required.get(name):
+        attrs['data-conditionally-required'] = 'true'
+    for code, message in get_messages(field, codes=codes).items():
+        attrs['data-error-%s' % code.replace('_', '-')] = message
+    return attrs
+
+
+def get_part_validation_attrs(form, name, field):
+    """
+    Returns html attributes for each input of a split date field describing the rules of its own part
+    (the whole date's rules are in the validation schema), or None for other fields
+    """
+    if not isinstance(field, SplitDateField):
+        return None
+    return [
+        get_validation_attrs(form, name, part, codes=part_message_codes)
+        for part in field.fields
+    ]
+
+
+def dump_schema(schema):
+    return json.dumps(schema, sort_keys=True).translate(json_escapes)
@@ -0,0 +1,122 @@
+import hashlib
+import re
+
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.template import loader
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import get_random_string
+from django.utils.encoding import force_bytes
+from django.utils.safestring import mark_safe
+from django.views.generic import View
+
+from govuk_forms.templatetags.govuk_forms import stream_context_key
+
+# masks of CSRF tokens differ in every response though they are all valid for the same secret
+csrf_input_re = re.compile(rb'(<input type="hidden" name="csrfmiddlewaretoken" value=")[^"]*(")')
+
+
+class FormStream:
+    """
+    Collects forms output by the `stream_form` template tag, replacing them with placeholders
+    so that the surrounding template can be sent before the forms are rendered
+    """
+
+    def __init__(self):
+        self.forms = []
+        self.placeholder = '<!--govuk-forms-stream-%s-' % get_random_string(12)
+        self.placeholder_re = re.compile(r'%s(\d+)-->' % re.escape(self.placeholder))
+
+    def add_form(self, form):
+        self.forms.append(form)
+        return mark_safe('%s%d-->' % (self.placeholder, len(self.forms) - 1))
+
+    def iter_chunks(self, content):
+        start = 0
+        for match in self.placeholder_re.finditer(content):
+            yield content[start:match.start()]
+            yield from self.forms[int(match.group(1))].iter_render()
+            start = match.end()
+        yield content[start:]
+
+
+def stream_template_response(request, template, context=None, using=None, **response_kwargs):
+    """
+    Renders a template into a streaming response where forms output with the `stream_form` template tag
+    are sent one fieldset or field group at a time, lowering time-to-first-byte of very long forms
+    """
+    if isinstance(template, (str, list, tuple)):
+        template = loader.select_template([template] if isinstance(template, str) else template, using=using)
+    stream = FormStream()
+    context = dict(context or {})
+    context[stream_context_key] = stream
+    content = template.render(context, request)
+    return StreamingHttpResponse(
+        (chunk for chunk in stream.iter_chunks(content) if chunk),
+        **response_kwargs
+    )
+
+
+class StreamingFormMixin:
+    """
+    Mixin for form views which streams responses using `stream_template_response`;
+    templates need to output forms using the `stream_form` template tag
+    """
+
+    def render_to_response(self, context, **response_kwargs):
+        response_kwargs.setdefault('content_type', self.content_type)
+        return stream_template_response(
+            self.request, self.get_template_names(), context,
+            using=self.template_engine, **response_kwargs
+        )
+
+
+def get_content_etag(request, content):
+    """
+    ETag of rendered content that ignores masks of CSRF token inputs but not the CSRF secret they are valid for
+    """
+    digest = hashlib.sha1(csrf_input_re.sub(rb'\1\2', content))
+    digest.update(force_bytes(request.META.get('CSRF_COOKIE') or ''))
+    return '"%s"' % digest.hexdigest()
+
+
+class ConditionalFormMixin:
+    """
+    Mixin for form views which adds an ETag to responses to GET requests and responds with 304 Not Modified
+    when the client already has identical content, e.g. unbound or pre-filled GOV.UK forms;
+    pages must not contain other content that differs in every response
+    """
+
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        if self.request.method not in ('GET', 'HEAD') or response.streaming or response.has_header('ETag'):
+            return response
+        if hasattr(response, 'render'):
+            response.render()
+        response['ETag'] = get_content_etag(self.request, response.content)
+        return get_conditional_response(self.request, etag=response['ETag'], response=response)
+
+
+def render_field_response(request, form_class, field_name, **form_kwargs):
+    """
+    Responds with the html of one field group of a form bound to posted data, e.g. for inline validation;
+    only the field and those related to it by conditional reveals are cleaned and rendered
+    """
+    form = form_class(data=request.POST, files=request.FILES, **form_kwargs)
+    if field_name not in form.fields:
+        raise Http404
+    form.partial_clean(form.get_reveal_index().get_dependencies(field_name))
+    return HttpResponse(form.render_field_group(field_name))
+
+
+class FieldRenderView(View):
+    """
+    Responds to posted form data with the html of the field group named by the `field_name` url keyword argument
+    """
+    form_class = None
+    http_method_names = ['post']
+
+    def get_form_kwargs(self):
+        return {}
+
+    def post(self, request, *args, **kwargs):
+        return render_field_response(request, self.form_class, kwargs['field_name'], **self.get_form_kwargs())
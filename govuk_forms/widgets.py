@@ -1,8 +1,18 @@
+import copy
 import datetime
+import functools
+import re
+import threading
+from collections import OrderedDict
 
 from django.forms import widgets
+from django.forms.renderers import get_default_renderer
 from django.utils.dates import MONTHS
-from django.utils.translation import gettext_lazy as _
+from django.utils.formats import get_format
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language, gettext_lazy as _
+
+from govuk_forms.renderers import is_overridden, render_string_value, render_value
 
 __all__ = (
     'Widget', 'MultiWidget',
@@ -28,9 +38,43 @@ group_template_names = (
 )
 
 
+@functools.lru_cache(maxsize=512)
+def _find_group_template_name(widget_class, group_template_names):
+    for widget_classes, template_name in group_template_names:
+        if issubclass(widget_class, widget_classes):
+            return template_name
+    return None
+
+
+def find_group_template_name(widget_class, group_template_names):
+    """
+    Finds the first group template that matches the widget class or its base classes;
+    results are cached by widget class and the contents of `group_template_names`
+    """
+    if not isinstance(group_template_names, tuple):
+        group_template_names = tuple(
+            (tuple(widget_classes) if isinstance(widget_classes, list) else widget_classes, template_name)
+            for widget_classes, template_name in group_template_names
+        )
+    return _find_group_template_name(widget_class, group_template_names)
+
+
+# render-time context is passed from GOVUKForm.render_field to widgets in `attrs` under this key
+# so that widgets, which may be shared between threads, are not modified while rendering
+render_context_attr = 'govuk_forms_render_context'
+
+
 class Widget(widgets.Widget):
     input_classes = 'form-control'
     input_error_classes = 'form-control-error'
+    accepts_render_context = False
+
+    @classmethod
+    def pop_render_context(cls, attrs):
+        if attrs and render_context_attr in attrs:
+            attrs = attrs.copy()
+            return attrs, attrs.pop(render_context_attr)
+        return attrs, {}
 
     def build_attrs(self, base_attrs, extra_attrs=None):
         attrs = super().build_attrs(base_attrs, extra_attrs=extra_attrs)
@@ -44,8 +88,54 @@ class MultiWidget(widgets.MultiWidget, Widget):
     subwidget_label_classes = ()
     subwidget_labels = ()
 
+    _is_localized = False
+
+    @property
+    def is_localized(self):
+        return self._is_localized
+
+    @is_localized.setter
+    def is_localized(self, is_localized):
+        # django propagates this to sub-widgets while rendering instead
+        self._is_localized = is_localized
+        for widget in self.widgets:
+            widget.is_localized = is_localized
+
+    def get_subwidgets(self):
+        return self.widgets
+
     def get_context(self, name, value, attrs):
-        context = super().get_context(name, value, attrs)
+        # like django's MultiWidget.get_context but using `get_subwidgets` and without modifying sub-widgets;
+        # `subwidget_attrs` in the render context add attributes to each sub-widget
+        attrs, render_context = self.pop_render_context(attrs)
+        subwidget_attrs = render_context.get('subwidget_attrs') or ()
+        context = super(widgets.MultiWidget, self).get_context(name, value, attrs)
+        if not isinstance(value, list):
+            value = self.decompress(value)
+        final_attrs = context['widget']['attrs']
+        input_type = final_attrs.pop('type', None)
+        id_ = final_attrs.get('id')
+        # name suffixes of sub-widgets, which django 3.1+ also takes from the keys of a dict of widgets
+        widgets_names = getattr(self, 'widgets_names', None) or ['_%s' % index for index in range(len(self.widgets))]
+        subwidgets = []
+        for index, (widget_name, widget) in enumerate(zip(widgets_names, self.get_subwidgets())):
+            try:
+                widget_value = value[index]
+            except IndexError:
+                widget_value = None
+            if id_:
+                widget_attrs = final_attrs.copy()
+                widget_attrs['id'] = '%s_%s' % (id_, index)
+            else:
+                widget_attrs = final_attrs
+            if index < len(subwidget_attrs):
+                widget_attrs = dict(widget_attrs, **subwidget_attrs[index])
+            subwidget = widget.get_context(name + widget_name, widget_value, widget_attrs)['widget']
+            if input_type is not None:
+                subwidget['type'] = input_type
+            subwidgets.append(subwidget)
+        context['widget']['subwidgets'] = subwidgets
+
         iterator = zip(context['widget']['subwidgets'],
                        self.subwidget_group_classes,
                        self.subwidget_label_classes,
@@ -105,50 +195,195 @@ class SplitHiddenDateTimeWidget(SplitDateTimeWidget):
 
 class CheckboxInput(widgets.CheckboxInput, Widget):
     template_name = 'govuk_forms/widgets/checkbox.html'
+    accepts_render_context = True
     inherit_label_from_field = True
     label = None
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.conditionally_revealed = {}
-
     def get_context(self, name, value, attrs):
+        attrs, render_context = self.pop_render_context(attrs)
         context = super().get_context(name, value, attrs)
-        if self.label:
-            context['widget']['label'] = self.label
-        context['conditionally_revealed'] = self.conditionally_revealed.get(True)
+        label = render_context.get('label') or self.label
+        if label:
+            context['widget']['label'] = label
+        context['conditionally_revealed'] = render_context.get('conditionally_revealed', {}).get(True)
         return context
 
 
-class ChoiceWidget(widgets.ChoiceWidget, Widget):
+class OptionCache:
+    """
+    Thread-safe LRU cache of rendered option fragments bounded by number of entries
+    and by total size, measured in characters of rendered html
+    """
+
+    def __init__(self, max_entries=256, max_size=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            try:
+                value, size = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, size):
+        if size > self.max_size:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_size:
+                evicted_key, (evicted_value, evicted_size) = self.entries.popitem(last=False)
+                self.size -= evicted_size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+option_cache = OptionCache()
+
+
+def freeze_choices(choices):
+    return tuple(
+        (value, tuple(tuple(choice) for choice in label)) if isinstance(label, (list, tuple)) else (value, label)
+        for value, label in choices
+    )
+
+
+class CachedOptionsMixin:
+    """
+    Reuses rendered options of choice widgets with static choices: unselected and selected fragments
+    are cached by widget class, name, attributes, choices, language and renderer;
+    options that conditionally reveal fields are still rendered for every request
+    and no options are cached if a project overrides the widget's or option's template
+    """
+    cache_options = True
+
+    def render(self, name, value, attrs=None, renderer=None):
+        # fragments depend on the renderer so it is passed on to `get_context` with the render context
+        attrs, render_context = self.pop_render_context(attrs)
+        render_context = dict(render_context, renderer=renderer or get_default_renderer())
+        attrs = dict(attrs or {}, **{render_context_attr: render_context})
+        return super().render(name, value, attrs=attrs, renderer=renderer)
+
+    def get_optgroups(self, name, value, attrs, render_context):
+        conditionally_revealed = render_context.get('conditionally_revealed') or {}
+        renderer = render_context.get('renderer')
+        cached_optgroups = self.get_cached_optgroups(name, attrs, renderer) if renderer else None
+        if cached_optgroups is None:
+            optgroups = self.optgroups(name, value, attrs)
+            if conditionally_revealed:
+                for group, options, index in optgroups:
+                    for option in options:
+                        option['conditionally_revealed'] = conditionally_revealed.get(option['value'])
+            return optgroups
+
+        # like django's ChoiceWidget.optgroups choosing between cached fragments
+        optgroups = []
+        has_selected = False
+        for group_name, cached_options, index in cached_optgroups:
+            subgroup = []
+            for option_value, label, subindex, string_value, html, selected_html in cached_options:
+                selected = string_value in value and (not has_selected or self.allow_multiple_selected)
+                has_selected |= selected
+                if option_value in conditionally_revealed:
+                    option = self.create_option(name, option_value, label, selected, index,
+                                                subindex=subindex, attrs=attrs)
+                    option['conditionally_revealed'] = conditionally_revealed[option_value]
+                else:
+                    option = {'value': option_value, 'selected': selected,
+                              'html': selected_html if selected else html}
+                subgroup.append(option)
+            optgroups.append((group_name, subgroup, index))
+        return optgroups
+
+    def get_cached_optgroups(self, name, attrs, renderer):
+        if not self.cache_options or not isinstance(self.choices, (list, tuple)):
+            return None
+        if is_overridden(renderer, self.template_name) or is_overridden(renderer, self.option_template_name):
+            # a project's templates may need every option's full context
+            return None
+        try:
+            key = (
+                type(self), self.option_template_name, name,
+                tuple(self.attrs.items()), tuple((attrs or {}).items()),
+                freeze_choices(self.choices), get_language(), renderer,
+            )
+            cached_optgroups = option_cache.get(key)
+        except TypeError:
+            # unhashable choices or attributes
+            return None
+        if cached_optgroups is None:
+            cached_optgroups, size = self.render_optgroups(name, attrs, renderer)
+            option_cache.set(key, cached_optgroups, size)
+        return cached_optgroups
+
+    def render_optgroups(self, name, attrs, renderer):
+        # like django's ChoiceWidget.optgroups rendering every option both unselected and selected
+        optgroups = []
+        size = 0
+        for index, (option_value, option_label) in enumerate(self.choices):
+            if option_value is None:
+                option_value = ''
+            if isinstance(option_label, (list, tuple)):
+                group_name, subindex, choices = option_value, 0, option_label
+            else:
+                group_name, subindex, choices = None, None, [(option_value, option_label)]
+            subgroup = []
+            for subvalue, sublabel in choices:
+                html, selected_html = (
+                    self.render_option(renderer, self.create_option(name, subvalue, sublabel, selected, index,
+                                                                    subindex=subindex, attrs=attrs))
+                    for selected in (False, True)
+                )
+                size += len(html) + len(selected_html)
+                subgroup.append((subvalue, sublabel, subindex, str(subvalue), html, selected_html))
+                if subindex is not None:
+                    subindex += 1
+            optgroups.append((group_name, tuple(subgroup), index))
+        return tuple(optgroups), size
+
+    def render_option(self, renderer, option):
+        # like `{% include option.template_name with widget=option %}`, which does not strip output
+        return mark_safe(renderer.get_template(option['template_name']).render({'widget': option}))
+
+
+class ChoiceWidget(CachedOptionsMixin, widgets.ChoiceWidget, Widget):
     template_name = 'govuk_forms/widgets/multiple-select.html'
     option_template_name = 'govuk_forms/widgets/multiple-select-option.html'
     separate_last_option = False
     last_option_label = _('or')
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.conditionally_revealed = {}
+    accepts_render_context = True
 
     @property
     def is_flat_list(self):
         return not any(isinstance(choice, (tuple, list)) for name, choice in self.choices)
 
     def get_context(self, name, value, attrs):
-        context = super().get_context(name, value, attrs)
+        attrs, render_context = self.pop_render_context(attrs)
+        # like django's ChoiceWidget.get_context but reusing cached options
+        context = super(widgets.ChoiceWidget, self).get_context(name, value, attrs)
+        context['widget']['optgroups'] = self.get_optgroups(name, context['widget']['value'], attrs, render_context)
         context.update(
             is_flat_list=self.is_flat_list,
             separate_last_option=self.separate_last_option,
-            last_option_label=self.last_option_label,
+            last_option_label=self.last_option_label or _('or'),
         )
         return context
 
-    def create_option(self, name, value, label, selected, index, subindex=None, attrs=None):
-        option = super().create_option(name, value, label, selected, index, subindex, attrs)
-        if self.conditionally_revealed:
-            option['conditionally_revealed'] = self.conditionally_revealed.get(value)
-        return option
-
 
 class CheckboxSelectMultiple(ChoiceWidget, widgets.CheckboxSelectMultiple):
     pass
@@ -214,8 +449,26 @@ class TimeInput(widgets.TimeInput, Widget):
     input_classes = 'form-control form-control-1-8'
 
 
-class Select(widgets.Select, Widget):
-    pass
+class Select(CachedOptionsMixin, widgets.Select, Widget):
+    template_name = 'govuk_forms/widgets/select.html'
+    # used instead, with options that are not cached, if a project overrides it
+    django_template_name = widgets.Select.template_name
+
+    def get_context(self, name, value, attrs):
+        attrs, render_context = self.pop_render_context(attrs)
+        # like django's Select.get_context but reusing cached options
+        context = super(widgets.ChoiceWidget, self).get_context(name, value, attrs)
+        renderer = render_context.get('renderer')
+        if renderer and is_overridden(renderer, self.django_template_name):
+            context['widget']['template_name'] = self.django_template_name
+            render_context = dict(render_context, renderer=None)
+        context['widget']['optgroups'] = self.get_optgroups(name, context['widget']['value'], attrs, render_context)
+        if self.allow_multiple_selected:
+            context['widget']['attrs']['multiple'] = True
+        return context
+
+    def _render(self, template_name, context, renderer=None):
+        return super()._render(context['widget']['template_name'], context, renderer=renderer)
 
 
 class NullBooleanSelect(widgets.NullBooleanSelect, Widget):
@@ -243,21 +496,74 @@ class ClearableFileInput(widgets.ClearableFileInput, FileInput):
     pass
 
 
+default_months = tuple(MONTHS.items())
+
+
+@functools.lru_cache(maxsize=64)
+def get_date_select_choices(years, months, none_values):
+    """
+    Returns immutable day, month and year choices shared by all SelectDateWidgets with the same options:
+    one set for required widgets and one with `none_values` prepended for optional widgets
+    """
+    required_choices = (
+        tuple((day, day) for day in range(1, 32)),
+        months,
+        tuple((year, year) for year in years),
+    )
+    optional_choices = tuple(
+        (none_value,) + choices
+        for none_value, choices in zip(none_values, required_choices)
+    )
+    return required_choices, optional_choices
+
+
+@functools.lru_cache(maxsize=1024)
+def render_select_options(choices, selected_values, language):
+    # like the options output by django's select.html template, but without creating option contexts
+    html = []
+    has_selected = False
+    for value, label in choices:
+        if value is None:
+            value = ''
+        selected = not has_selected and str(value) in selected_values
+        has_selected |= selected
+        html.append('\n  <option value="%s"%s>%s</option>\n' % (
+            render_string_value(value), ' selected' if selected else '', render_value(label),
+        ))
+    return mark_safe(''.join(html))
+
+
+class DateSelect(Select):
+    """
+    Select for parts of a SelectDateWidget, flat choices are output as a cached fragment
+    """
+    template_name = 'govuk_forms/widgets/date-select.html'
+
+    def get_context(self, name, value, attrs):
+        attrs, render_context = self.pop_render_context(attrs)
+        context = super(widgets.ChoiceWidget, self).get_context(name, value, attrs)
+        context['widget']['options'] = render_select_options(
+            tuple(self.choices), tuple(context['widget']['value']), get_language(),
+        )
+        return context
+
+
 class SelectDateWidget(MultiWidget):
     template_name = 'govuk_forms/widgets/split-date.html'
-    select_widget = Select
+    select_widget = DateSelect
     none_value = (0, _('Not set'))
     subwidget_group_classes = ('form-group form-group-day-select',
                                'form-group form-group-month-select',
                                'form-group form-group-year-select')
     subwidget_label_classes = ('form-label', 'form-label', 'form-label')  # or form-label-bold
     subwidget_labels = (_('Day'), _('Month'), _('Year'))
+    empty_values = (None, '', '0')
+    pseudo_iso_date_re = re.compile(r'^(\d+)-(\d+)-(\d+)$')
 
     def __init__(self, attrs=None, years=None, months=None, empty_label=None):
         this_year = datetime.date.today().year
-        self.years = [(i, i) for i in years or range(this_year, this_year + 10)]
-        self.months = [(month_value, month_name) for month_value, month_name in (months or MONTHS).items()]
-        self.days = [(i, i) for i in range(1, 32)]
+        years = tuple(years or range(this_year, this_year + 10))
+        months = tuple(months.items()) if months else default_months
 
         if isinstance(empty_label, (list, tuple)):
             self.year_none_value = (0, empty_label[0])
@@ -269,27 +575,65 @@ class SelectDateWidget(MultiWidget):
             self.month_none_value = none_value
             self.day_none_value = none_value
 
-        date_widgets = (self.select_widget(attrs=attrs, choices=self.days),
-                        self.select_widget(attrs=attrs, choices=self.months),
-                        self.select_widget(attrs=attrs, choices=self.years))
+        self.required_choices, self.optional_choices = get_date_select_choices(
+            years, months, (self.day_none_value, self.month_none_value, self.year_none_value),
+        )
+        self.days, self.months, self.years = self.required_choices
+
+        date_widgets = []
+        for choices in self.required_choices:
+            widget = self.select_widget(attrs=attrs)
+            # share immutable choices rather than the list copies django makes
+            widget.choices = choices
+            date_widgets.append(widget)
         super().__init__(date_widgets, attrs=attrs)
 
-    def get_context(self, name, value, attrs):
-        iterators = zip(
-            self.widgets,
-            (self.days, self.months, self.years),
-            (self.day_none_value, self.month_none_value, self.year_none_value)
-        )
-        for widget, choices, none_value in iterators:
-            widget.is_required = self.is_required
-            widget.choices = choices if self.is_required else [none_value] + choices
-        return super().get_context(name, value, attrs)
+    def get_subwidgets(self):
+        if self.is_required:
+            return self.widgets
+        subwidgets = []
+        iterator = zip(self.widgets, self.required_choices, self.optional_choices,
+                       (self.day_none_value, self.month_none_value, self.year_none_value))
+        for widget, required_choices, optional_choices, none_value in iterator:
+            choices = widget.choices
+            widget = copy.copy(widget)
+            if choices is required_choices:
+                widget.choices = optional_choices
+            else:
+                widget.choices = (none_value,) + tuple(choices)
+            subwidgets.append(widget)
+        return subwidgets
+
+    def value_from_datadict(self, data, files, name):
+        # like django's SelectDateWidget, the field receives a single formatted date string
+        day, month, year = super().value_from_datadict(data, files, name)
+        if all(part in self.empty_values for part in (day, month, year)):
+            return None
+        try:
+            date_value = datetime.date(int(year), int(month), int(day))
+        except (TypeError, ValueError):
+            # pseudo-ISO date with zeros for unselected values, e.g. '2017-0-23'
+            return '%s-%s-%s' % (year or 0, month or 0, day or 0)
+        return date_value.strftime(get_format('DATE_INPUT_FORMATS')[0])
 
     def decompress(self, value):
+        if isinstance(value, str):
+            return self.decompress_string(value)
         if value:
             return [value.day, value.month, value.year]
         return [None, None, None]
 
+    def decompress_string(self, value):
+        try:
+            value = datetime.datetime.strptime(value, get_format('DATE_INPUT_FORMATS')[0]).date()
+        except ValueError:
+            match = self.pseudo_iso_date_re.match(value)
+            if match:
+                year, month, day = map(int, match.groups())
+                return [day, month, year]
+            return [None, None, None]
+        return [value.day, value.month, value.year]
+
 
 widget_replacements = {
     widgets.TextInput: (TextInput, ()),
@@ -308,14 +652,28 @@ widget_replacements = {
     widgets.CheckboxSelectMultiple: (CheckboxSelectMultiple, ('choices',)),
     widgets.RadioSelect: (RadioSelect, ('choices',)),
     widgets.SplitDateTimeWidget: (SplitDateTimeWidget, ()),  # TODO: migrate formats
+    widgets.SplitHiddenDateTimeWidget: (SplitHiddenDateTimeWidget, ()),  # TODO: migrate formats
     widgets.FileInput: (FileInput, ()),
     widgets.ClearableFileInput: (ClearableFileInput, ()),
     widgets.SelectDateWidget: (SelectDateWidget, ('years', 'months')),  # TODO: migrate empty values
 }
 
 
+def find_replacement(widget_class, replacements):
+    for base_class in widget_class.__mro__:
+        replacement = replacements.get(base_class)
+        if replacement:
+            return replacement
+    return None
+
+
 def replace_widget(widget, replacements):
-    replacement = replacements.get(widget.__class__)
+    """
+    Replaces a django widget with the GOV.UK widget registered for its class or closest base class
+    """
+    if isinstance(widget, Widget):
+        return widget
+    replacement = find_replacement(widget.__class__, replacements)
     if not replacement:
         return widget
     replacement_widget, widget_args = replacement
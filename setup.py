@@ -18,7 +18,7 @@ setup_extensions = importlib.import_module('govuk_forms.setup_extensions')
 
 setup_requires = ['setuptools', 'pip', 'wheel']
 install_requires = ['django>=1.11']
-extras_require = {}
+extras_require = {'jinja2': ['jinja2']}
 tests_require = ['flake8']
 setup_requires += install_requires
 
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import django
+from django.conf import settings
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+demo_path = os.path.join(root_path, 'demo')
+if demo_path not in sys.path:
+    # demo forms are used to test rendering
+    sys.path.insert(0, demo_path)
+
+if not settings.configured:
+    settings.configure(
+        DEBUG=False,
+        SECRET_KEY='tests',
+        INSTALLED_APPS=['govuk_forms'],
+        LANGUAGE_CODE='en-gb',
+        USE_I18N=True,
+        USE_L10N=True,
+        USE_TZ=True,
+        TIME_ZONE='Europe/London',
+        TEMPLATES=[{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'APP_DIRS': True,
+        }],
+    )
+    django.setup()
@@ -0,0 +1,43 @@
+from unittest import mock
+
+from django.apps import apps
+from django.test import SimpleTestCase, override_settings
+
+from demo_service.forms import FieldsetForm, LongForm
+from govuk_forms.forms import GOVUKForm
+
+
+class WarmUpTestCase(SimpleTestCase):
+    def setUp(self):
+        self.app_config = apps.get_app_config('govuk_forms')
+
+    def test_template_names(self):
+        template_names = self.app_config.get_template_names()
+        self.assertIn('govuk_forms/field.html', template_names)
+        self.assertIn('govuk_forms/widgets/split-date.html', template_names)
+        self.assertIn('govuk_forms/check-your-answers.html', template_names)
+        self.assertIn('django/forms/widgets/input.html', template_names)
+        self.assertNotIn('govuk_forms/profiling-panel.html', template_names)
+
+    def test_opt_in(self):
+        with mock.patch.object(self.app_config, 'warm_up') as warm_up:
+            self.app_config.ready()
+            warm_up.assert_not_called()
+            with override_settings(GOVUK_FORMS_WARM_UP=True, GOVUK_FORMS_WARM_UP_FORMS=['demo_service.forms.LongForm']):
+                self.app_config.ready()
+            warm_up.assert_called_once_with(['demo_service.forms.LongForm'])
+
+    def test_renders_forms(self):
+        with mock.patch.object(GOVUKForm, 'as_div', autospec=True, return_value='') as as_div:
+            self.app_config.warm_up(['demo_service.forms.LongForm', FieldsetForm])
+        self.assertEqual([type(call[0][0]) for call in as_div.call_args_list],
+                         [LongForm, LongForm, FieldsetForm, FieldsetForm])
+        self.assertEqual([call[0][0].is_bound for call in as_div.call_args_list], [False, True, False, True])
+
+    def test_failing_forms_logged(self):
+        with mock.patch.object(LongForm, '__init__', side_effect=RuntimeError('no such table')), \
+                mock.patch.object(GOVUKForm, 'as_div', autospec=True, return_value='') as as_div, \
+                self.assertLogs('govuk_forms.apps', 'WARNING') as logs:
+            self.app_config.warm_up([LongForm, FieldsetForm])
+        self.assertIn('no such table', logs.output[0])
+        self.assertEqual([type(call[0][0]) for call in as_div.call_args_list], [FieldsetForm, FieldsetForm])
@@ -0,0 +1,60 @@
+from django import forms
+from django.test import SimpleTestCase
+from django.utils import translation
+
+from demo_service.benchmarks import long_form_invalid, long_form_valid, revealing_form_invalid, revealing_form_valid
+from demo_service.forms import LongForm, RevealingForm
+from govuk_forms.forms import GOVUKForm
+from govuk_forms.batches import validate_batch
+
+
+def prefixed(data, prefix):
+    return {'%s-%s' % (prefix, name): value for name, value in data.items()}
+
+
+class BatchValidationTestCase(SimpleTestCase):
+    def assertMatchesForms(self, form_class, rows, results):
+        self.assertEqual([result.row for result in results], list(range(len(rows))))
+        for data, result in zip(rows, results):
+            form = form_class(data=data)
+            self.assertEqual(result.errors, {
+                name: [str(message) for message in messages]
+                for name, messages in form.errors.items()
+            })
+            self.assertEqual(result.cleaned_data, form.cleaned_data)
+
+    def test_results_match_individual_forms(self):
+        rows = [prefixed(long_form_invalid, 'demo'), prefixed(long_form_valid, 'demo')] * 2
+        rows.append({})
+        self.assertMatchesForms(LongForm, rows, list(validate_batch(LongForm, rows)))
+
+    def test_conditionally_revealed_fields(self):
+        rows = [revealing_form_valid, revealing_form_invalid, revealing_form_valid, {'choices': 'b'}]
+        results = list(validate_batch(RevealingForm, rows))
+        self.assertMatchesForms(RevealingForm, rows, results)
+        self.assertEqual(results[0].errors, {})
+        self.assertIn('choices_d', results[1].errors)
+        self.assertIn('choices_b', results[3].errors)
+
+    def test_field_changes_not_carried_over(self):
+        class Form(GOVUKForm):
+            name = forms.CharField(required=False)
+            reference = forms.CharField(required=False)
+
+            def clean_name(self):
+                # later fields become required for named rows
+                if self.cleaned_data['name']:
+                    self.fields['reference'].required = True
+                return self.cleaned_data['name']
+
+        rows = [{'name': 'x', 'reference': '1'}, {}, {'name': 'y'}, {}]
+        results = list(validate_batch(Form, rows))
+        self.assertMatchesForms(Form, rows, results)
+        self.assertEqual([set(result.errors) for result in results], [set(), set(), {'reference'}, set()])
+
+    def test_process_pool(self):
+        rows = [revealing_form_invalid, revealing_form_valid] * 5
+        with translation.override('cy'):
+            results = list(validate_batch(RevealingForm, iter(rows), workers=2, chunk_size=3))
+            self.assertEqual(results, list(validate_batch(RevealingForm, rows)))
+        self.assertEqual(len(results), 10)
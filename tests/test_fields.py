@@ -0,0 +1,85 @@
+import copy
+import datetime
+import itertools
+import unittest
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase
+from django.utils import translation
+
+from govuk_forms import columnar
+from govuk_forms.fields import SplitDateField, YearField, format_year_bounds_error
+
+sample_values = ['', None, '1', '0', '29', '31', '2', '12', '13', ' 5', 'x', '5.0', '-5', '99999999999', '1900',
+                 '2000', '99', '18', 2016]
+
+
+class ColumnarCleaningTestCase(SimpleTestCase):
+    def assertMatchesField(self, field, rows, use_numpy):
+        dates, error_codes = columnar.clean_date_columns(field, *zip(*rows), use_numpy=use_numpy)
+        self.assertEqual(len(dates), len(rows))
+        for row, date, codes in zip(rows, dates, error_codes):
+            try:
+                expected_date, expected_messages = field.clean(list(row)), []
+            except ValidationError as e:
+                expected_date, expected_messages = None, e.messages
+            self.assertEqual((date, field.get_error_messages(codes)), (expected_date, expected_messages), row)
+
+    def check_split_date_field(self, use_numpy):
+        rows = list(itertools.product(sample_values, repeat=3))
+        rows += [('29', '2', year) for year in ('2000', '1900', '2016', '2017', '16', '00')]
+        for required in (True, False):
+            with self.subTest(required=required):
+                self.assertMatchesField(SplitDateField(required=required), rows, use_numpy)
+
+    def check_year_field(self, use_numpy):
+        for required in (True, False):
+            field = YearField(required=required)
+            years, error_codes = columnar.clean_year_column(field, sample_values, use_numpy=use_numpy)
+            for value, year, code in zip(sample_values, years, error_codes):
+                try:
+                    expected_year, expected_messages = field.clean(value), None
+                except ValidationError as e:
+                    expected_year, expected_messages = None, e.messages
+                self.assertEqual(year, expected_year, value)
+                self.assertEqual([field.get_error_message(code)] if code else None, expected_messages, value)
+
+    def test_python(self):
+        self.check_split_date_field(use_numpy=False)
+        self.check_year_field(use_numpy=False)
+
+    @unittest.skipUnless(columnar.numpy, 'NumPy is not installed')
+    def test_numpy(self):
+        self.check_split_date_field(use_numpy=True)
+        self.check_year_field(use_numpy=True)
+        self.assertEqual(SplitDateField().clean_columns([], [], []), ([], []))
+
+
+class DateFieldConstructionTestCase(SimpleTestCase):
+    def test_messages_translated_when_output(self):
+        field = SplitDateField()
+        self.addCleanup(format_year_bounds_error.cache_clear)
+        with translation.override('cy'), \
+                mock.patch('govuk_forms.fields.gettext', side_effect=lambda message: 'cy: %s' % message):
+            with self.assertRaises(ValidationError) as context:
+                field.clean(['1', '1', '1800'])
+            self.assertEqual(context.exception.messages, [
+                'cy: Year should be between 1900 and %s.' % field.fields[2].current_year
+            ])
+        with self.assertRaises(ValidationError) as context:
+            field.clean(['32', 'x', '1800'])
+        self.assertEqual(context.exception.messages, [
+            'Day should be between 1 and 31.', 'Enter month as a number.',
+            'Year should be between 1900 and %s.' % field.fields[2].current_year,
+        ])
+
+    def test_copies_independent(self):
+        field = SplitDateField()
+        field_copy = copy.deepcopy(field)
+        field_copy.fields[0].error_messages['invalid'] = 'Changed'
+        field_copy.fields[0].validators.pop()
+        self.assertEqual(field.fields[0].error_messages['invalid'], 'Enter day as a number.')
+        self.assertEqual(len(field.fields[0].validators), 2)
+        self.assertEqual(field_copy.clean(['1', '2', '2000']), datetime.date(2000, 2, 1))
+        self.assertIsNot(field_copy.widget, field.widget)
@@ -0,0 +1,401 @@
+import datetime
+import gc
+import sys
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django import forms
+from django.core.cache import caches
+from django.core.signals import request_finished, request_started
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone, translation
+
+from demo_service.benchmarks import scenarios
+from demo_service.forms import FieldsetForm, LongForm, RevealingForm
+from govuk_forms import widgets as govuk_widgets
+from govuk_forms.forms import GOVUKForm, RenderState
+from govuk_forms.renderers import get_compiled_renderer
+
+
+class RenderPlanTestCase(SimpleTestCase):
+    def test_plan_shared_by_instances(self):
+        self.assertIs(LongForm().render_plan, LongForm(data={}).render_plan)
+        self.assertIsNot(LongForm().render_plan, FieldsetForm().render_plan)
+
+    def test_plans_discarded_with_form_classes(self):
+        form_class = type('DynamicForm', (FieldsetForm,), {})
+        form_class().as_div()
+        self.assertEqual(len(form_class.render_plans), 1)
+        form_class = weakref.ref(form_class)
+        gc.collect()
+        self.assertIsNone(form_class())
+
+    def test_plan_rows(self):
+        render_plan = FieldsetForm().render_plan
+        self.assertEqual(render_plan.rows, [
+            (True, 'Enter your name', ('first_name', 'last_name')),
+            (True, 'Enter your address', ('address', 'city', 'postcode', 'country')),
+            (False, None, ('email',)),
+        ])
+        render_plan = RevealingForm().render_plan
+        self.assertEqual(set(render_plan.conditionally_revealed),
+                         {'hidden_at_first', 'choices_a', 'choices_b', 'choices_d', 'multi_choices_a',
+                          'multi_choices_b'})
+        self.assertEqual(render_plan.rows, [
+            (False, None, ('show',)),
+            (False, None, ('choices',)),
+            (False, None, ('multi_choices',)),
+        ])
+
+    def test_plan_follows_field_changes(self):
+        form = FieldsetForm()
+        form.fields['email'].widget = forms.HiddenInput()
+        self.assertIsNot(form.render_plan, FieldsetForm().render_plan)
+        self.assertNotIn('id="id_email-group"', form.as_div())
+
+    def test_instance_overrides(self):
+        form = FieldsetForm()
+        form.fieldsets = ()
+        self.assertIsNot(form.render_plan, FieldsetForm().render_plan)
+        self.assertNotIn('<legend class="heading-medium">', form.as_div())
+
+    def test_static_classes(self):
+        class Form(GOVUKForm):
+            field_label_classes = 'form-label-bold '
+            text = forms.CharField()
+
+        field_plan = Form().render_plan.fields['text']
+        self.assertEqual(field_plan.group_template_name, 'govuk_forms/field.html')
+        self.assertEqual(field_plan.group_classes, ('form-group',))
+        self.assertEqual(field_plan.label_classes, 'form-label-bold')
+        self.assertIn('form-group-required', Form().as_div())
+
+
+class WidgetReplacementTestCase(SimpleTestCase):
+    def test_widgets_replaced_once_per_class(self):
+        class Form(GOVUKForm):
+            text = forms.CharField()
+            choice = forms.ChoiceField(choices=(('a', 'A'),), widget=forms.RadioSelect)
+
+        class ReplacingForm(Form):
+            auto_replace_widgets = True
+            widget_replacements = {forms.RadioSelect: (govuk_widgets.InlineRadioSelect, ('choices',))}
+
+        self.assertIsInstance(ReplacingForm.base_fields['text'].widget, govuk_widgets.TextInput)
+        self.assertIsInstance(ReplacingForm.base_fields['choice'].widget, govuk_widgets.InlineRadioSelect)
+        self.assertNotIsInstance(Form.base_fields['text'].widget, govuk_widgets.TextInput)
+        self.assertIs(Form.declared_fields['text'], Form.base_fields['text'])
+
+        form = ReplacingForm()
+        self.assertIsInstance(form.fields['text'].widget, govuk_widgets.TextInput)
+        self.assertIsNot(form.fields['text'].widget, ReplacingForm.base_fields['text'].widget)
+
+
+class ConditionallyRevealedTestCase(SimpleTestCase):
+    def test_fields_rendered_once(self):
+        form = RevealingForm(initial={'choices': 'b'})
+        html = form.as_div()
+        self.assertEqual(set(form.field_render_counts), set(form.fields))
+        self.assertEqual(set(form.field_render_counts.values()), {1})
+        self.assertEqual(html.count('id="id_choices_d-group"'), 1)
+
+    def test_fieldset_fields_rendered_once(self):
+        class Form(RevealingForm):
+            fieldsets = [
+                ['Options', ['choices', 'choices_a', 'choices_b']],
+            ]
+
+        form = Form()
+        html = form.as_div()
+        self.assertEqual(set(form.field_render_counts.values()), {1})
+        self.assertEqual(html.count('id="id_choices_a-group"'), 1)
+        self.assertRegex(html, r'id="id_choices_a-group" class="[^"]*js-hidden')
+
+    def test_unreferenced_fields_not_rendered(self):
+        class Form(GOVUKForm):
+            auto_replace_widgets = True
+            reveal_conditionally = {'choices': {'x': 'choices_x'}}
+
+            choices = forms.ChoiceField(choices=(('a', 'A'), ('b', 'B')), widget=forms.RadioSelect)
+            choices_x = forms.CharField()
+
+        form = Form()
+        self.assertNotIn('choices_x', form.as_div())
+        self.assertEqual(form.field_render_counts, {'choices': 1})
+
+    def test_chained_and_grouped_reveals(self):
+        class Form(GOVUKForm):
+            auto_replace_widgets = True
+            reveal_conditionally = {
+                'contact': {'post': ('address', 'postcode'), 'phone': 'phone'},
+                'phone': {'1': 'extension'},
+            }
+
+            contact = forms.ChoiceField(choices=(('post', 'Post'), ('phone', 'Phone')), widget=forms.RadioSelect)
+            address = forms.CharField()
+            postcode = forms.CharField(required=False)
+            phone = forms.ChoiceField(choices=(('1', 'Office'), ('2', 'Mobile')), widget=forms.RadioSelect)
+            extension = forms.CharField()
+
+        self.assertFalse(Form.base_fields['address'].required)
+        self.assertEqual(dict(Form.reveal_index.required),
+                         {'address': True, 'postcode': False, 'phone': True, 'extension': True})
+
+        form = Form(data={'contact': 'post', 'phone': '1'})
+        self.assertEqual(set(form.errors), {'address'})
+        form = Form(data={'contact': 'phone', 'phone': '1'})
+        self.assertEqual(set(form.errors), {'extension'})
+        form = Form(data={'contact': 'phone', 'phone': '2'})
+        self.assertTrue(form.is_valid())
+
+        form = Form()
+        html = form.as_div()
+        self.assertEqual(set(form.field_render_counts.values()), {1})
+        self.assertIn('data-target="id_contact_reveal_0-group"', html)
+        self.assertRegex(html, r'<div id="id_contact_reveal_0-group" class="panel [^"]*js-hidden">\s*'
+                               r'<div id="id_address-group"')
+        self.assertRegex(html, r'id="id_extension-group" class="[^"]*js-hidden')
+        form = Form()
+        form.renderer = get_compiled_renderer(form.renderer)
+        self.assertEqual(form.as_div(), html)
+
+    def test_instance_overrides(self):
+        form = RevealingForm(data={'show': 'on', 'choices': 'b'})
+        form.reveal_conditionally = {'choices': {'b': 'choices_b'}}
+        self.assertEqual(set(form.errors), {'choices_b'})
+        self.assertEqual(set(form.conditionally_revealed), {'choices_b'})
+
+    def test_changed_conditionally_revealed(self):
+        form = RevealingForm(data={'choices': 'b'})
+        form.conditionally_revealed['choices_b']['required'] = False
+        self.assertNotIn('choices_b', form.errors)
+        form = RevealingForm(data={'choices': 'a'})
+        form.conditionally_revealed = {'choices_a': {'required': True}}
+        self.assertEqual(set(form.errors), {'choices_a'})
+        self.assertEqual(form.conditionally_revealed, {'choices_a': {'required': True}})
+
+    def test_invalid_revealed_fields(self):
+        form = RevealingForm(data={'choices': 'b', 'choices_b': 'x'})
+        self.assertEqual(form.errors['choices_b'], ['Enter a whole number.'])
+
+    def test_instance_override_of_untriggered_reveal(self):
+        class Form(GOVUKForm):
+            show = forms.BooleanField(required=False)
+            extra = forms.CharField()
+
+        form = Form(data={})
+        form.reveal_conditionally = {'show': {True: 'extra'}}
+        self.assertEqual(form.errors, {})
+        form = Form(data={'show': 'on'})
+        form.reveal_conditionally = {'show': {True: 'extra'}}
+        self.assertEqual(set(form.errors), {'extra'})
+
+
+class ConcurrentRenderingTestCase(SimpleTestCase):
+    def test_forms_sharing_widgets(self):
+        expected_output = {
+            scenario.name: scenario.run(scenario.make_form())
+            for scenario in scenarios
+        }
+        shared_widgets = {}
+        for scenario in scenarios:
+            shared_widgets.setdefault(scenario.form_class, {
+                name: field.widget
+                for name, field in scenario.make_form().fields.items()
+            })
+
+        def render(scenario):
+            form = scenario.make_form()
+            for name, field in form.fields.items():
+                field.widget = shared_widgets[scenario.form_class][name]
+            return scenario.name, scenario.run(form)
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # switch threads as often as possible
+        try:
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                results = list(executor.map(render, scenarios * 10))
+        finally:
+            sys.setswitchinterval(switch_interval)
+        for name, output in results:
+            self.assertEqual(output, expected_output[name], 'Output of %s differs' % name)
+
+    def test_async_rendering(self):
+        for scenario in scenarios:
+            expected_output = scenario.make_form().as_div()
+            for concurrency in (1, 3, 100):
+                with self.subTest(scenario=scenario.name, concurrency=concurrency):
+                    form = scenario.make_form()
+                    form.async_render_concurrency = concurrency
+                    self.assertEqual(async_to_sync(form.as_div_async)(), expected_output)
+
+        form = LongForm(data={})
+        self.assertEqual(async_to_sync(form.render_field_async)('text'), form.render_field('text', form.fields['text']))
+        self.assertEqual(async_to_sync(form.error_summary_async)(), LongForm(data={}).error_summary())
+
+
+class ErrorIndexTestCase(SimpleTestCase):
+    def test_errors_indexed_in_field_order(self):
+        form = RevealingForm(data={'show': 'on', 'choices': 'b', 'choices_b': 'x', 'multi_choices': ['z']})
+        self.assertEqual(list(form.error_index), ['hidden_at_first', 'choices_b', 'multi_choices'])
+        form.error_summary()
+        self.assertEqual(set(form._bound_fields_cache), set(form.error_index))
+
+        form.add_error('show', 'Not now')
+        self.assertEqual(list(form.error_index), ['show', 'hidden_at_first', 'choices_b', 'multi_choices'])
+        self.assertIn('Not now', form.render_field('show', form.fields['show']))
+        form.add_error(None, 'Try again')
+        self.assertEqual(len(form.error_index), 4)
+        self.assertEqual(RevealingForm().error_index, {})
+
+
+class BoundFieldSnapshotTestCase(SimpleTestCase):
+    def test_snapshot_matches_bound_field(self):
+        form = RevealingForm(data={'show': 'on', 'choices': 'b', 'choices_b': 'x'})
+        render_state = RenderState(form)
+        for name in ('show', 'hidden_at_first', 'choices', 'choices_b', 'choices_d'):
+            bound_field, snapshot = form[name], render_state.get_bound_field(name)
+            self.assertIs(render_state.get_bound_field(name), snapshot)
+            self.assertEqual(snapshot.auto_id, bound_field.auto_id)
+            self.assertEqual(snapshot.html_name, bound_field.html_name)
+            self.assertEqual(snapshot.errors, bound_field.errors)
+            self.assertEqual(set(snapshot.css_classes('form-group').split()),
+                             set(bound_field.css_classes('form-group').split()))
+            # other attributes are those of the bound field
+            self.assertEqual(snapshot.value(), bound_field.value())
+            self.assertIs(snapshot.field, bound_field.field)
+            self.assertEqual(str(snapshot), str(bound_field))
+
+    def test_css_classes_in_order(self):
+        # unlike `BoundField.css_classes`, the order does not depend on string hashing
+        form = RevealingForm(data={'choices': 'x'})
+        snapshot = RenderState(form).get_bound_field('choices')
+        self.assertEqual(snapshot.css_classes('form-group inline'),
+                         'form-group inline form-group-error form-group-required')
+
+    def test_revealed_panel_shares_snapshot(self):
+        form = RevealingForm()
+        render_state = RenderState(form)
+        revealed_panel = render_state.get_revealed_panel(('choices_b',))
+        self.assertIs(revealed_panel.bound_field, render_state.get_bound_field('choices_b'))
+
+
+class ErrorSummaryTestCase(SimpleTestCase):
+    def test_deterministic_ids(self):
+        self.assertEqual(LongForm(data={}).error_summary(), LongForm(data={}).error_summary())
+        form = LongForm(data={})
+        self.assertIn('id="error-summary-heading-demo"', form.error_summary())
+        self.assertIn('id="error-summary-heading-demo-2"', form.error_summary())
+        form = FieldsetForm(data={}, prefix='other')
+        self.assertIn('aria-labelledby="error-summary-heading-other"', form.error_summary())
+        form = RevealingForm(data={'choices': 'b'})
+        self.assertIn('aria-labelledby="error-summary-heading-form"', form.error_summary())
+
+    def test_ids_unique_within_requests(self):
+        request_started.send(sender=self.__class__)
+        try:
+            self.assertIn('id="error-summary-heading-form"', RevealingForm(data={'choices': 'b'}).error_summary())
+            self.assertIn('id="error-summary-heading-form-2"', FieldsetForm(data={}).error_summary())
+            self.assertIn('id="error-summary-heading-demo"', LongForm(data={}).error_summary())
+        finally:
+            request_finished.send(sender=self.__class__)
+        self.assertIn('id="error-summary-heading-form"', FieldsetForm(data={}).error_summary())
+
+
+class ClientValidationTestCase(SimpleTestCase):
+    def test_schema(self):
+        schema = RevealingForm().get_validation_schema()
+        fields = {field['name']: field for field in schema['fields']}
+        self.assertEqual(list(fields), list(RevealingForm.base_fields))
+        self.assertEqual(fields['choices']['choices'], ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual((fields['choices_b']['required'], fields['choices_b']['conditional']), (True, True))
+        self.assertEqual(fields['choices_a']['type'], 'email')
+        self.assertEqual(fields['choices_d']['type'], 'split_date')
+        self.assertEqual([(part['min'], part['max']) for part in fields['choices_d']['parts']][:2], [(1, 31), (1, 12)])
+        self.assertEqual(fields['choices_d']['parts'][0]['messages']['max_value'], 'Day should be between 1 and 31.')
+        self.assertEqual(schema['reveal_conditionally']['choices']['d'], ['choices_d'])
+
+        form = LongForm()
+        self.assertEqual(
+            [field['name'] for field in form.get_validation_schema()['fields']],
+            ['demo-%s' % name for name, field in form.fields.items() if not field.widget.is_hidden],
+        )
+        script = form.validation_schema_script()
+        self.assertTrue(script.startswith('<script type="application/json" id="demo-validation-schema">'))
+        self.assertNotIn('<', script[script.index('>') + 1:script.index('</script>')])
+
+    def test_attributes(self):
+        form = RevealingForm()
+        form.client_validation = True
+        html = form.render_field('choices_b', form.fields['choices_b'])
+        self.assertIn('data-validation-type="integer" data-conditionally-required="true"', html)
+        self.assertIn('data-error-invalid="Enter a whole number."', html)
+        self.assertNotIn('data-validation', RevealingForm().as_div())
+
+    def test_split_date_part_attributes(self):
+        form = RevealingForm()
+        form.client_validation = True
+        html = form.render_field('choices_d', form.fields['choices_d'])
+        self.assertNotIn('split_date', html)
+        self.assertRegex(html, r'<input [^>]*name="choices_d_0"[^>]*data-validation-type="integer"'
+                               r'[^>]*data-error-invalid="Enter day as a number\."')
+        self.assertRegex(html, r'<input [^>]*name="choices_d_2"[^>]*data-validation-type="year"')
+        self.assertEqual(html.count('data-error-invalid="Enter a valid date."'), 0)
+
+
+class FragmentCacheTestCase(SimpleTestCase):
+    class Form(LongForm):
+        fragment_caching = True
+
+    class SubForm(Form):
+        pass
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+
+    def assertRenderedFromCache(self, form, from_cache=True):
+        html = form.as_div()
+        self.assertEqual(not form.field_render_counts, from_cache)
+        return html
+
+    def test_unbound_forms_cached(self):
+        html = self.assertRenderedFromCache(self.Form(), from_cache=False)
+        self.assertEqual(self.assertRenderedFromCache(self.Form()), html)
+        self.assertEqual(html, LongForm().as_div())
+        self.assertRenderedFromCache(self.Form(data={}), from_cache=False)
+        self.assertRenderedFromCache(self.Form(initial={'text': 'sample'}), from_cache=False)
+        self.assertRenderedFromCache(self.Form(initial={'text': 'sample'}))
+        self.assertRenderedFromCache(self.Form(initial={'text': object()}), from_cache=False)
+        self.assertRenderedFromCache(self.Form(initial={'text': object()}), from_cache=False)
+        self.assertRenderedFromCache(self.Form(prefix='other'), from_cache=False)
+        with translation.override('cy'):
+            self.assertRenderedFromCache(self.Form(), from_cache=False)
+        self.assertEqual(self.Form().submit_button(), LongForm().submit_button())
+        self.assertEqual(self.Form().submit_button('Save'), LongForm().submit_button('Save'))
+
+    def test_cached_per_time_zone(self):
+        class Form(GOVUKForm):
+            fragment_caching = True
+            when = forms.DateTimeField(initial=datetime.datetime(2020, 1, 1, 12, tzinfo=datetime.timezone.utc))
+
+        with timezone.override('UTC'):
+            self.assertIn('value="2020-01-01 12:00:00"', self.assertRenderedFromCache(Form(), from_cache=False))
+        with timezone.override('Asia/Tokyo'):
+            self.assertIn('value="2020-01-01 21:00:00"', self.assertRenderedFromCache(Form(), from_cache=False))
+
+    def test_invalidation(self):
+        self.assertRenderedFromCache(self.Form(), from_cache=False)
+        self.assertRenderedFromCache(self.SubForm(), from_cache=False)
+        self.SubForm.invalidate_fragment_cache()
+        self.assertRenderedFromCache(self.Form())
+        self.assertRenderedFromCache(self.SubForm(), from_cache=False)
+        self.Form.invalidate_fragment_cache()
+        self.assertRenderedFromCache(self.Form(), from_cache=False)
+        self.assertRenderedFromCache(self.SubForm(), from_cache=False)
+
+    def test_disabled_by_setting(self):
+        self.assertRenderedFromCache(self.Form(), from_cache=False)
+        with override_settings(GOVUK_FORMS_FRAGMENT_CACHING=False):
+            self.assertRenderedFromCache(self.Form(), from_cache=False)
@@ -0,0 +1,179 @@
+import datetime
+import uuid
+from unittest import mock
+
+from django import forms
+from django.conf.urls import url
+from django.core.exceptions import ImproperlyConfigured
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.http import Http404, HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve
+
+from govuk_forms.fields import SplitDateField
+from govuk_forms.forms import GOVUKForm
+from govuk_forms import journeys
+from govuk_forms.journeys import JourneyView, get_field_codec, get_form_codec
+
+
+class PersonForm(GOVUKForm):
+    name = forms.CharField(label='Full name')
+    date_of_birth = SplitDateField(label='Date of birth')
+
+
+class ContactForm(GOVUKForm):
+    reveal_conditionally = {'method': {'email': 'email', 'phone': 'phone'}}
+
+    method = forms.ChoiceField(label='Contact method', choices=(('email', 'E-mail'), ('phone', 'Phone')))
+    email = forms.EmailField(label='E-mail address')
+    phone = forms.CharField(label='Phone number')
+    interests = forms.MultipleChoiceField(label='Interests', required=False,
+                                          choices=(('a', 'Alpha'), ('b', 'Beta'), ('c', 'Gamma')))
+
+
+class RegistrationJourney(JourneyView):
+    steps = (('person', PersonForm), ('contact', ContactForm))
+    template_name = 'journey.html'
+    done_data = None
+
+    def done(self, cleaned_data):
+        RegistrationJourney.done_data = cleaned_data
+        return HttpResponse('done')
+
+
+urlpatterns = [
+    url(r'^journey/$', RegistrationJourney.as_view(), name='journey'),
+    url(r'^journey/(?P<step>[a-z-]+)/$', RegistrationJourney.as_view(), name='journey'),
+]
+
+person_data = {'name': 'Jane Doe', 'date_of_birth_0': '1', 'date_of_birth_1': '2', 'date_of_birth_2': '1990'}
+contact_data = {'method': 'phone', 'email': '', 'phone': '0123', 'interests': ['a', 'c']}
+
+
+@override_settings(ROOT_URLCONF=__name__, TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {'loaders': [
+        ('django.template.loaders.locmem.Loader', {'journey.html': '{{ form.as_div }}{{ check_your_answers }}'}),
+        'django.template.loaders.app_directories.Loader',
+    ]},
+}])
+class JourneyTestCase(SimpleTestCase):
+    def setUp(self):
+        self.session = SessionStore()
+
+    def request(self, path, data=None):
+        factory = RequestFactory()
+        request = factory.get(path) if data is None else factory.post(path, data)
+        request.session = self.session
+        request.resolver_match = resolve(path)
+        response = request.resolver_match.func(request, *request.resolver_match.args, **request.resolver_match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def test_steps_in_order(self):
+        response = self.request('/journey/')
+        self.assertEqual(response['Location'], '/journey/person/')
+        response = self.request('/journey/contact/')
+        self.assertEqual(response['Location'], '/journey/person/')
+        with self.assertRaises(Http404):
+            self.request('/journey/unknown/')
+
+        response = self.request('/journey/person/', {'name': ''})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('error-message', response.content.decode())
+
+        response = self.request('/journey/person/', person_data)
+        self.assertEqual(response['Location'], '/journey/contact/')
+        response = self.request('/journey/contact/', contact_data)
+        self.assertEqual(response['Location'], '/journey/check-your-answers/')
+
+        response = self.request('/journey/check-your-answers/')
+        content = response.content.decode()
+        for answer in ('Jane Doe', '1 Feb 1990', 'Phone', '0123', 'Alpha, Gamma'):
+            self.assertIn('<dd class="cya-answer">%s</dd>' % answer, content)
+        self.assertNotIn('E-mail address', content)
+        self.assertIn('href="/journey/contact/"', content)
+
+        response = self.request('/journey/check-your-answers/', {})
+        self.assertEqual(response.content, b'done')
+        self.assertEqual(RegistrationJourney.done_data, {
+            'person': {'name': 'Jane Doe', 'date_of_birth': datetime.date(1990, 2, 1)},
+            'contact': {'method': 'phone', 'email': '', 'phone': '0123', 'interests': ['a', 'c']},
+        })
+        self.assertEqual(self.request('/journey/')['Location'], '/journey/person/')
+
+    def test_compact_storage(self):
+        self.request('/journey/person/', person_data)
+        self.request('/journey/contact/', contact_data)
+        stored = self.session['govuk_forms_journey_RegistrationJourney']
+        self.assertEqual(stored['person'][1], ['Jane Doe', datetime.date(1990, 2, 1).toordinal()])
+        self.assertEqual(stored['contact'][1], ['phone', '', '0123', ['a', 'c']])
+        self.assertEqual(get_form_codec(ContactForm).decode(stored['contact'][1])['interests'], ['a', 'c'])
+
+        response = self.request('/journey/person/')
+        self.assertIn('value="Jane Doe"', response.content.decode())
+
+    def test_unchanged_steps_are_not_revalidated(self):
+        self.request('/journey/person/', person_data)
+        with mock.patch.object(PersonForm, 'is_valid', autospec=True, side_effect=GOVUKForm.is_valid) as is_valid:
+            self.request('/journey/person/', dict(person_data, csrfmiddlewaretoken='ignored'))
+            self.assertEqual(is_valid.call_count, 0)
+            self.request('/journey/person/', dict(person_data, name='John Doe'))
+            self.assertEqual(is_valid.call_count, 1)
+        self.assertEqual(self.session['govuk_forms_journey_RegistrationJourney']['person'][1][0], 'John Doe')
+
+
+class FieldCodecTestCase(SimpleTestCase):
+    def test_changed_choices(self):
+        stored = get_field_codec(forms.ChoiceField(choices=(('a', 'Alpha'), ('b', 'Beta')))).encode('a')
+        codec = get_field_codec(forms.ChoiceField(choices=(('b', 'Beta'), ('a', 'Alpha'))))
+        self.assertEqual(codec.decode(stored), 'a')
+        self.assertEqual(codec.display('a'), 'Alpha')
+        # positions stored by earlier versions are not looked up
+        self.assertIsNone(codec.decode(5))
+        codec = get_field_codec(ContactForm.base_fields['interests'])
+        self.assertEqual(codec.decode(['a', 0]), ['a'])
+
+    def test_model_choices(self):
+        instance = mock.Mock(pk=3)
+        codec = get_field_codec(forms.ModelChoiceField(queryset=None))
+        self.assertEqual(codec.encode(instance), '3')
+        with mock.patch.object(codec.field, 'to_python', return_value=instance):
+            self.assertIs(codec.decode('3'), instance)
+        with mock.patch.object(codec.field, 'to_python', side_effect=forms.ValidationError('missing')):
+            self.assertIsNone(codec.decode('3'))
+        codec = get_field_codec(forms.ModelMultipleChoiceField(queryset=None))
+        self.assertEqual(codec.encode([instance, mock.Mock(pk=4)]), ['3', '4'])
+        with mock.patch.object(codec.field, 'to_python', side_effect=forms.ValidationError('missing')):
+            self.assertEqual(codec.decode(['3']), [])
+
+    def test_uuids_and_durations(self):
+        for field, value in ((forms.UUIDField(), uuid.uuid4()), (forms.DurationField(), datetime.timedelta(1, 5))):
+            codec = get_field_codec(field)
+            self.assertIsInstance(codec.encode(value), str)
+            self.assertEqual(codec.decode(codec.encode(value)), value)
+        self.assertIsNone(get_field_codec(forms.UUIDField()).decode('not-a-uuid'))
+
+    def test_file_fields_rejected(self):
+        class UploadForm(GOVUKForm):
+            upload = forms.FileField()
+
+        with self.assertRaises(ImproperlyConfigured):
+            JourneyView.as_view(steps=(('upload', UploadForm),))
+
+    def test_registered_codecs(self):
+        class UploadCodec(journeys.FieldCodec):
+            def encode(self, value):
+                return None if value is None else value.name
+
+        with mock.patch.object(journeys, 'field_codecs', list(journeys.field_codecs)):
+            journeys.register_field_codec(forms.FileField, UploadCodec)
+            self.assertIsInstance(get_field_codec(forms.FileField()), UploadCodec)
+        self.assertNotIn((forms.FileField, UploadCodec), journeys.field_codecs)
+
+    def test_form_codecs_kept_on_classes(self):
+        self.assertIs(get_form_codec(ContactForm), get_form_codec(ContactForm))
+        self.assertIs(ContactForm.journey_codec, get_form_codec(ContactForm))
+        form_class = type('DynamicForm', (ContactForm,), {})
+        self.assertIsNot(get_form_codec(form_class), get_form_codec(ContactForm))
@@ -0,0 +1,58 @@
+from asgiref.sync import async_to_sync, sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from demo_service.forms import LongForm, RevealingForm
+from govuk_forms.profiling import RenderProfile, RenderProfileMiddleware, get_active_profile
+
+
+class RenderProfileTestCase(SimpleTestCase):
+    def test_records_fields(self):
+        form = LongForm()
+        renderer = form.renderer
+        with RenderProfile() as profile:
+            html = form.as_div()
+        self.assertIsNone(get_active_profile())
+        self.assertIs(form.renderer, renderer)
+        self.assertEqual(html, LongForm().as_div())
+
+        self.assertEqual(len(profile.records), len(form.fields))
+        record = next(record for record in profile.records if record.field_name == 'select')
+        self.assertEqual(record.widget_class, 'govuk_forms.widgets.Select')
+        self.assertEqual(record.template_name, 'govuk_forms/field.html')
+        self.assertEqual(record.renderer_calls, 2)
+        self.assertGreater(record.bytes, 0)
+        self.assertEqual(profile.renderer_calls['govuk_forms/widgets/select.html'], 3)
+
+        report = profile.report(limit=3)
+        self.assertEqual(len(report['fields']), 3)
+        self.assertEqual(report['field_count'], len(form.fields))
+        self.assertGreaterEqual(report['fields'][0]['own_duration'], report['fields'][1]['own_duration'])
+
+    def test_nested_fields(self):
+        form = RevealingForm(data={'choices': 'b'})
+        form.render_profile = RenderProfile()
+        form.as_div()
+        records = {record.field_name: record for record in form.render_profile.records}
+        self.assertEqual(records['choices_b'].depth, 1)
+        self.assertEqual(records['choices'].depth, 0)
+        self.assertLess(records['choices'].own_duration, records['choices'].duration)
+        self.assertEqual(form.render_profile.total_duration,
+                         sum(record.duration for record in records.values() if record.depth == 0))
+
+    def test_active_in_async_threads(self):
+        form = LongForm()
+        with RenderProfile() as profile:
+            async_to_sync(sync_to_async(form.as_div, thread_sensitive=False))()
+            async_to_sync(form.as_div_async)()
+        self.assertEqual(len(profile.records), 2 * len(form.fields))
+
+    def test_middleware(self):
+        def view(request):
+            return HttpResponse(LongForm().as_div())
+
+        request = RequestFactory().get('/')
+        with self.assertLogs('govuk_forms.profiling') as logs:
+            RenderProfileMiddleware(view)(request)
+        self.assertEqual(len(request.govuk_forms_render_profile.records), len(LongForm.base_fields))
+        self.assertIn('Rendered %d form fields' % len(LongForm.base_fields), logs.output[0])
@@ -0,0 +1,93 @@
+import os
+import unittest
+from unittest import mock
+
+from django.forms.renderers import get_default_renderer
+from django.test import SimpleTestCase, override_settings
+
+from demo_service.benchmarks import scenarios
+from demo_service.forms import FieldsetForm
+from govuk_forms.renderers import CompiledRenderer, builders, get_form_renderer
+
+try:
+    import jinja2
+    from django.forms.renderers import Jinja2
+except ImportError:
+    jinja2 = None
+
+
+class CompiledRendererTestCase(SimpleTestCase):
+    def test_output_matches_templates(self):
+        for scenario in scenarios:
+            if scenario.form_class.compiled_rendering:
+                continue
+            with self.subTest(scenario=scenario.name):
+                expected = scenario.run(scenario.make_form())
+                form = scenario.make_form()
+                form.renderer = CompiledRenderer(form.renderer)
+                self.assertEqual(scenario.run(form), expected)
+
+    def test_builders_match_shipped_templates(self):
+        renderer = CompiledRenderer(get_default_renderer())
+        for template_name in builders:
+            self.assertIsNotNone(renderer.get_builder(template_name), 'Builder for %s is outdated' % template_name)
+
+    def test_falls_back_to_overridden_templates(self):
+        class OverridingRenderer(type(get_default_renderer())):
+            def get_template(self, template_name):
+                template = super().get_template(template_name)
+                if template_name == 'django/forms/widgets/input.html':
+                    template = mock.Mock(wraps=template, template=mock.Mock(source='<input>'))
+                return template
+
+            def render(self, template_name, context, request=None):
+                return 'fallback'
+
+        renderer = CompiledRenderer(OverridingRenderer())
+        self.assertIsNotNone(renderer.get_builder('govuk_forms/field.html'))
+        self.assertIsNone(renderer.get_builder('django/forms/widgets/input.html'))
+        self.assertIsNone(renderer.get_builder('govuk_forms/widgets/checkbox.html'))
+        self.assertEqual(renderer.render('govuk_forms/widgets/checkbox.html', {}), 'fallback')
+        self.assertEqual(renderer.render('govuk_forms/submit-button.html', {'label': 'Save'}),
+                         '<input type="submit" class="button" value="Save"/>')
+
+
+@unittest.skipUnless(jinja2, 'Jinja2 is not installed')
+class Jinja2TemplatesTestCase(SimpleTestCase):
+    def test_all_templates_available(self):
+        app_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        def list_templates(dirname):
+            root = os.path.join(app_path, 'govuk_forms', dirname)
+            return {
+                os.path.relpath(os.path.join(path, file_name), root)
+                for path, directory_names, file_names in os.walk(root)
+                for file_name in file_names
+            }
+
+        self.assertEqual(list_templates('jinja2'), list_templates('templates') - {'govuk_forms/profiling-panel.html'})
+
+    def test_output_matches_django_templates(self):
+        renderer = Jinja2()
+        for scenario in scenarios:
+            with self.subTest(scenario=scenario.name):
+                expected = scenario.run(scenario.make_form())
+                form = scenario.make_form()
+                form.renderer = CompiledRenderer(renderer) if scenario.form_class.compiled_rendering else renderer
+                self.assertHTMLEqual(scenario.run(form), expected)
+
+        context = {
+            'answers': [('/change/', [('name', 'Name & "alias"', 'Jane <Doe>')])],
+            'change_link_text': 'Change',
+        }
+        self.assertHTMLEqual(renderer.render('govuk_forms/check-your-answers.html', context),
+                             get_default_renderer().render('govuk_forms/check-your-answers.html', context))
+
+    def test_renderer_setting(self):
+        self.addCleanup(get_form_renderer.cache_clear)
+        get_form_renderer.cache_clear()
+        with override_settings(GOVUK_FORMS_RENDERER='django.forms.renderers.Jinja2'):
+            self.assertIsInstance(FieldsetForm().renderer, Jinja2)
+            self.assertIs(FieldsetForm(data={}).renderer, FieldsetForm().renderer)
+        get_form_renderer.cache_clear()
+        self.assertIs(FieldsetForm().renderer, get_default_renderer())
@@ -0,0 +1,100 @@
+from django.http import Http404
+from django.template import engines
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.views.generic import FormView
+
+from demo_service.benchmarks import long_form_invalid, revealing_form_invalid, revealing_form_valid, scenarios
+from demo_service.forms import FieldsetForm, LongForm, RevealingForm
+from govuk_forms.views import (
+    ConditionalFormMixin, FieldRenderView, render_field_response, stream_template_response,
+)
+
+
+class StreamingTestCase(SimpleTestCase):
+    def test_chunks_match_as_div(self):
+        for scenario in scenarios:
+            with self.subTest(scenario=scenario.name):
+                chunks = list(scenario.make_form().iter_render())
+                self.assertGreater(len(chunks), 1)
+                self.assertEqual(''.join(chunks), scenario.make_form().as_div())
+
+    def test_streamed_template_matches_rendered_template(self):
+        template = engines['django'].from_string(
+            '{% load govuk_forms %}<form>{{ form.error_summary }}{% stream_form form %}{{ form.submit_button }}</form>'
+        )
+        request = RequestFactory().get('/')
+        expected = template.render({'form': FieldsetForm(data={'first_name': 'Jane'})}, request)
+
+        response = stream_template_response(request, template, {'form': FieldsetForm(data={'first_name': 'Jane'})})
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 5)
+        self.assertTrue(chunks[0].startswith('<form>'))
+        self.assertEqual(''.join(chunks), expected)
+
+
+class FieldRenderTestCase(SimpleTestCase):
+    def test_matches_fully_cleaned_form(self):
+        for form_class, data in ((LongForm, long_form_invalid), (RevealingForm, revealing_form_invalid),
+                                 (RevealingForm, revealing_form_valid)):
+            request = RequestFactory().post('/', {
+                '%s-%s' % (form_class.prefix, name) if form_class.prefix else name: value
+                for name, value in data.items()
+            })
+            form = form_class(data=request.POST)
+            for name in form_class.base_fields:
+                with self.subTest(form=form_class.__name__, field=name):
+                    response = render_field_response(request, form_class, name)
+                    self.assertEqual(response.content.decode(), form.render_field_group(name))
+
+    def test_only_related_fields_cleaned(self):
+        self.assertEqual(RevealingForm.reveal_index.get_dependencies('choices_b'), {'choices', 'choices_b'})
+        request = RequestFactory().post('/', {'choices': 'b', 'choices_b': 'x', 'show': 'on'})
+        form = RevealingForm(data=request.POST)
+        form.partial_clean({'choices', 'choices_b'})
+        self.assertEqual(list(form.errors), ['choices_b'])
+        self.assertEqual(form.cleaned_data, {'choices': 'b'})
+
+        view = FieldRenderView.as_view(form_class=RevealingForm)
+        response = view(request, field_name='choices')
+        self.assertIn('Enter a whole number.', response.content.decode())
+        with self.assertRaises(Http404):
+            view(request, field_name='unknown')
+
+
+class ConditionalFormView(ConditionalFormMixin, FormView):
+    form_class = FieldsetForm
+    template_name = 'form.html'
+
+
+@override_settings(TEMPLATES=[{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {'loaders': [
+        ('django.template.loaders.locmem.Loader', {
+            'form.html': '<form>{% csrf_token %}{{ form.error_summary }}{{ form.as_div }}</form>',
+        }),
+        'django.template.loaders.app_directories.Loader',
+    ]},
+}])
+class ConditionalGetTestCase(SimpleTestCase):
+    def test_unchanged_content_not_modified(self):
+        view = ConditionalFormView.as_view()
+        first_request = RequestFactory().get('/')
+        response = view(first_request)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH=etag)
+        request.META['CSRF_COOKIE'] = first_request.META['CSRF_COOKIE']
+        response = view(request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # tokens valid for a different CSRF secret
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(view(request).status_code, 200)
+
+        request = RequestFactory().post('/', {}, HTTP_IF_NONE_MATCH=etag)
+        request.META['CSRF_COOKIE'] = first_request.META['CSRF_COOKIE']
+        response = view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
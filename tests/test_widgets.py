@@ -0,0 +1,174 @@
+import copy
+import datetime
+
+from django import forms
+from django.forms import widgets
+from django.forms.renderers import TemplatesSetting
+from django.test import SimpleTestCase, override_settings
+from django.utils import translation
+from django.utils.formats import get_format
+
+from govuk_forms import widgets as govuk_widgets
+
+
+class GroupTemplateNameTestCase(SimpleTestCase):
+    def test_lookup_follows_base_classes(self):
+        class CustomRadioSelect(govuk_widgets.InlineRadioSelect):
+            pass
+
+        find = govuk_widgets.find_group_template_name
+        group_template_names = govuk_widgets.group_template_names
+        self.assertEqual(find(CustomRadioSelect, group_template_names), 'govuk_forms/field-fieldset.html')
+        self.assertEqual(find(govuk_widgets.SelectMultiple, group_template_names), 'govuk_forms/field.html')
+        self.assertEqual(find(widgets.CheckboxInput, group_template_names), 'govuk_forms/field-no-label.html')
+        self.assertEqual(find(widgets.TextInput, group_template_names), 'govuk_forms/field.html')
+
+    def test_changed_template_names(self):
+        find = govuk_widgets.find_group_template_name
+        self.assertEqual(find(widgets.TextInput, govuk_widgets.group_template_names), 'govuk_forms/field.html')
+        group_template_names = [([widgets.TextInput], 'custom.html')] + list(govuk_widgets.group_template_names)
+        self.assertEqual(find(widgets.TextInput, group_template_names), 'custom.html')
+        self.assertIsNone(find(widgets.TextInput, ()))
+
+
+class ReplaceWidgetTestCase(SimpleTestCase):
+    def test_replaces_subclasses(self):
+        class CustomTextInput(widgets.TextInput):
+            pass
+
+        widget = govuk_widgets.replace_widget(CustomTextInput(attrs={'size': 3}), govuk_widgets.widget_replacements)
+        self.assertIsInstance(widget, govuk_widgets.TextInput)
+        self.assertEqual(widget.attrs, {'size': 3})
+
+        widget = govuk_widgets.replace_widget(widgets.SplitHiddenDateTimeWidget(),
+                                              govuk_widgets.widget_replacements)
+        self.assertIsInstance(widget, govuk_widgets.SplitHiddenDateTimeWidget)
+        self.assertTrue(widget.is_hidden)
+
+    def test_keeps_govuk_widgets(self):
+        widget = govuk_widgets.InlineRadioSelect(choices=(('a', 'A'),))
+        self.assertIs(govuk_widgets.replace_widget(widget, govuk_widgets.widget_replacements), widget)
+        widget = widgets.HiddenInput()
+        self.assertIs(govuk_widgets.replace_widget(widget, govuk_widgets.widget_replacements), widget)
+
+
+class SelectDateWidgetTestCase(SimpleTestCase):
+    def test_choices_shared_by_instances(self):
+        widget = govuk_widgets.SelectDateWidget(years=range(2000, 2010))
+        other_widget = govuk_widgets.SelectDateWidget(years=range(2000, 2010))
+        self.assertIs(widget.years, other_widget.years)
+        self.assertIs(widget.optional_choices, other_widget.optional_choices)
+        self.assertIs(copy.deepcopy(widget).widgets[1].choices, widget.months)
+        self.assertIsNot(widget.years, govuk_widgets.SelectDateWidget(years=range(2000, 2011)).years)
+
+    def test_options_match_select_template(self):
+        widget = govuk_widgets.SelectDateWidget(years=range(2000, 2010))
+        widget.is_required = False
+        for subwidget in widget.get_subwidgets():
+            select = govuk_widgets.Select(choices=subwidget.choices)
+            for value in (None, 0, 2, '2005'):
+                self.assertEqual(subwidget.render('date', value), select.render('date', value))
+        with translation.override('cy'):
+            self.assertIn('>Ionawr</option>', widget.render('date', None))
+
+    def test_bound_data(self):
+        # like django's SelectDateWidget, fields receive one date string rather than a list of parts
+        widget = govuk_widgets.SelectDateWidget(years=range(2000, 2010))
+        data = {'date_0': '23', 'date_1': '2', 'date_2': '2005'}
+        date_string = widget.value_from_datadict(data, {}, 'date')
+        self.assertEqual(date_string, datetime.date(2005, 2, 23).strftime(get_format('DATE_INPUT_FORMATS')[0]))
+        self.assertEqual(widget.value_from_datadict(dict(data, date_1=''), {}, 'date'), '2005-0-23')
+        self.assertIsNone(widget.value_from_datadict({'date_0': '', 'date_1': '0'}, {}, 'date'))
+        self.assertEqual(widget.decompress(date_string), [23, 2, 2005])
+        self.assertEqual(widget.decompress('2005-0-23'), [23, 0, 2005])
+
+        field = forms.DateField(widget=govuk_widgets.SelectDateWidget(years=range(2000, 2010)))
+        self.assertEqual(field.clean(field.widget.value_from_datadict(data, {}, 'date')), datetime.date(2005, 2, 23))
+        self.assertIn('<option value="2" selected>', field.widget.render('date', date_string))
+
+
+class MultiWidgetTestCase(SimpleTestCase):
+    def test_named_subwidgets(self):
+        class NameWidget(govuk_widgets.MultiWidget):
+            def decompress(self, value):
+                return value.split(' ', 1) if value else [None, None]
+
+        widget = NameWidget({'first': widgets.TextInput, '': widgets.TextInput})
+        if not hasattr(widget, 'widgets_names'):
+            self.skipTest('named sub-widgets need django 3.1+')
+        html = widget.render('name', 'Jane Doe')
+        self.assertIn('name="name_first" value="Jane"', html)
+        self.assertIn('name="name" value="Doe"', html)
+        self.assertEqual(widget.value_from_datadict({'name_first': 'Jane', 'name': 'Doe'}, {}, 'name'),
+                         ['Jane', 'Doe'])
+
+
+class OptionCacheTestCase(SimpleTestCase):
+    def test_lru_bounds(self):
+        cache = govuk_widgets.OptionCache(max_entries=2, max_size=10)
+        cache.set('a', 'A', 4)
+        cache.set('b', 'B', 4)
+        self.assertEqual(cache.get('a'), 'A')
+        cache.set('c', 'C', 4)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.size, 8)
+        cache.set('d', 'D', 11)
+        self.assertIsNone(cache.get('d'))
+        cache.set('a', 'A', 7)
+        self.assertEqual(list(cache.entries), ['a'])
+        self.assertEqual(cache.size, 7)
+
+    def test_cached_options_match_rendered_options(self):
+        choices = (('a', 'Alpha'), ('Group', (('b', 'Beta'), ('c', 'Gamma'))), (None, 'None'))
+        for widget_class in (govuk_widgets.Select, govuk_widgets.SelectMultiple,
+                             govuk_widgets.RadioSelect, govuk_widgets.CheckboxSelectMultiple):
+            cached_widget = widget_class(choices=choices)
+            widget = widget_class(choices=choices)
+            widget.cache_options = False
+            for value in (None, 'b', ['a', 'c']):
+                with self.subTest(widget=widget_class.__name__, value=value):
+                    self.assertEqual(cached_widget.render('choice', value, attrs={'id': 'id_choice'}),
+                                     widget.render('choice', value, attrs={'id': 'id_choice'}))
+
+    def test_options_cached_per_language(self):
+        widget = govuk_widgets.RadioSelect(choices=(('a', translation.gettext_lazy('Yes')),))
+        self.assertIn('Yes', widget.render('choice', None))
+        with translation.override('cy'):
+            self.assertIn('Ie', widget.render('choice', None))
+
+    @override_settings(TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {'loaders': [
+            ('django.template.loaders.locmem.Loader', {
+                'django/forms/widgets/select.html': '<select class="custom">{% for group in widget.optgroups %}'
+                                                    '{% for option in group.1 %}{{ option.label }};'
+                                                    '{% endfor %}{% endfor %}</select>',
+            }),
+            'django.template.loaders.app_directories.Loader',
+        ]},
+    }])
+    def test_overridden_django_select_template(self):
+        renderer = TemplatesSetting()
+        widget = govuk_widgets.Select(choices=(('a', 'Alpha'), ('b', 'Beta')))
+        self.assertEqual(widget.render('choice', 'a', renderer=renderer), '<select class="custom">Alpha;Beta;</select>')
+        self.assertIn('<option value="a" selected>Alpha</option>', widget.render('choice', 'a'))
+
+    @override_settings(TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'OPTIONS': {'loaders': [
+            ('django.template.loaders.locmem.Loader', {
+                # as shipped before options were cached
+                'govuk_forms/widgets/multiple-select.html': '{% for group, options, index in widget.optgroups %}'
+                                                            '{% for option in options %}'
+                                                            '{% include option.template_name with widget=option %}'
+                                                            '{% endfor %}{% endfor %}',
+            }),
+            'django.template.loaders.app_directories.Loader',
+        ]},
+    }], INSTALLED_APPS=['django.forms', 'govuk_forms'])
+    def test_overridden_choice_template(self):
+        renderer = TemplatesSetting()
+        widget = govuk_widgets.RadioSelect(choices=(('a', 'Alpha'), ('b', 'Beta')))
+        html = widget.render('choice', 'a', attrs={'id': 'id_choice'}, renderer=renderer)
+        self.assertIn('<label id="id_choice_1-label" for="id_choice_1">Beta</label>', html)
+        self.assertRegex(html, r'<input type="radio" name="choice" value="a" [^>]*checked>')